@@ -0,0 +1,16 @@
+import shutil
+import tempfile
+
+import pytest
+from django.test import override_settings
+
+
+@pytest.fixture(autouse=True, scope='session')
+def test_settings(django_test_environment):
+    """Настройки тестов core.runner и временный каталог для загрузок."""
+    from core.runner import test_settings
+
+    media_root = tempfile.mkdtemp()
+    with test_settings(), override_settings(MEDIA_ROOT=media_root):
+        yield
+    shutil.rmtree(media_root, ignore_errors=True)
@@ -0,0 +1,394 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+
+BUSY_TIMEOUT = 5
+LOCAL_MAX_BYTES = 8 * 1024 * 1024
+INVALIDATION_LOG_SIZE = 10_000
+CULL_EVERY = 100
+# Ограничение SQLite на число параметров запроса.
+MAX_PARAMS = 900
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache_entries ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE INDEX IF NOT EXISTS cache_entries_expires '
+    'ON cache_entries (expires)',
+    # key IS NULL — очистка всего кеша.
+    'CREATE TABLE IF NOT EXISTS cache_invalidations ('
+    'id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT)',
+)
+
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+def _expired(expires, now=None) -> bool:
+    return expires is not None and expires <= (now or time.time())
+
+
+def _chunks(items, size=MAX_PARAMS) -> object:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class LocalTier:
+    """
+    LRU-словарь процесса, ограниченный суммарным размером значений.
+
+    Значения хранятся сериализованными, как в LocMemCache. position —
+    последняя применённая запись журнала инвалидаций.
+    """
+
+    def __init__(self, max_bytes=LOCAL_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.position = None
+        self.lock = threading.RLock()
+
+    def _pop(self, key) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(key) + len(entry[0])
+
+    def get(self, key) -> bytes:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if _expired(entry[1]):
+                self._pop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, pickled, expires) -> None:
+        size = len(key) + len(pickled)
+        with self.lock:
+            self._pop(key)
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (pickled, expires)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._pop(next(iter(self.entries)))
+
+    def discard(self, keys) -> None:
+        with self.lock:
+            for key in keys:
+                self._pop(key)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+def local_tier(location, max_bytes) -> LocalTier:
+    # Django создаёт экземпляр бэкенда на каждый поток, а локальный
+    # уровень должен быть один на процесс.
+    with _tiers_lock:
+        if location not in _tiers:
+            _tiers[location] = LocalTier(max_bytes)
+        return _tiers[location]
+
+
+class TwoTierCache(BaseCache):
+    """
+    Кеш из двух уровней: LRU в памяти процесса перед общим файлом SQLite.
+
+    Общий уровень видят все процессы хоста, поэтому фрагменты и
+    поколения лент в них совпадают. Каждая запись в общий уровень
+    добавляет ключ в журнал инвалидаций. Перед чтением процесс сверяет
+    PRAGMA data_version своего подключения: номер меняется, только
+    когда другое подключение что-то зафиксировало, и проверка не читает
+    файл. Если номер изменился, ключи из новых записей журнала
+    вытесняются из локального уровня. Журнал хранит последние
+    INVALIDATION_LOG_SIZE записей; отставший сильнее процесс очищает
+    локальный уровень целиком.
+    """
+
+    def __init__(self, location, params) -> None:
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.location = location
+        self.log_size = options.get(
+            'INVALIDATION_LOG_SIZE', INVALIDATION_LOG_SIZE
+        )
+        self.local = local_tier(
+            location, options.get('LOCAL_MAX_BYTES', LOCAL_MAX_BYTES)
+        )
+        self._connections = threading.local()
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        state = self._connections
+        # После fork подключение родителя использовать нельзя.
+        if getattr(state, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self.location,
+                timeout=BUSY_TIMEOUT,
+                isolation_level=None,
+                uri=self.location.startswith('file:'),
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            for statement in SCHEMA:
+                connection.execute(statement)
+            with self.local.lock:
+                if self.local.position is None:
+                    # Локальный уровень ещё пуст: журнал до этого момента
+                    # к нему не относится.
+                    self.local.position = connection.execute(
+                        'SELECT COALESCE(MAX(id), 0) '
+                        'FROM cache_invalidations'
+                    ).fetchone()[0]
+            state.connection = connection
+            state.data_version = None
+            state.pid = os.getpid()
+        return state.connection
+
+    def _sync(self, connection) -> None:
+        """Вытесняет из локального уровня ключи, изменённые другими."""
+        state = self._connections
+        version = connection.execute('PRAGMA data_version').fetchone()[0]
+        if version == state.data_version:
+            return
+        state.data_version = version
+        with self.local.lock:
+            rows = connection.execute(
+                'SELECT id, key FROM cache_invalidations WHERE id > ? '
+                'ORDER BY id',
+                [self.local.position]
+            ).fetchall()
+            if not rows:
+                return
+            if rows[0][0] > self.local.position + 1 or any(
+                key is None for _, key in rows
+            ):
+                self.local.clear()
+            else:
+                self.local.discard(key for _, key in rows)
+            self.local.position = rows[-1][0]
+
+    @contextmanager
+    def _transaction(self) -> object:
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            # Значения, записанные в локальный уровень до отката.
+            self.local.clear()
+            raise
+        connection.execute('COMMIT')
+
+    def _invalidate(self, connection, keys) -> None:
+        if not keys:
+            return
+        connection.executemany(
+            'INSERT INTO cache_invalidations (key) VALUES (?)',
+            [(key,) for key in keys]
+        )
+        last_id = connection.execute(
+            'SELECT MAX(id) FROM cache_invalidations'
+        ).fetchone()[0]
+        # Журнал обрезается примерно раз в тысячу записей.
+        if last_id % 1000 < len(keys):
+            connection.execute(
+                'DELETE FROM cache_invalidations WHERE id <= ?',
+                [last_id - self.log_size]
+            )
+
+    def _cull(self, connection) -> None:
+        """
+        Удаляет просроченные и лишние записи общего уровня.
+
+        COUNT выполняется не на каждую запись, а раз в CULL_EVERY записей
+        процесса. Вытесненные значения не менялись, поэтому журнал
+        инвалидаций не трогается.
+        """
+        self._writes += 1
+        if self._writes % CULL_EVERY:
+            return
+        connection.execute(
+            'DELETE FROM cache_entries WHERE expires <= ?', [time.time()]
+        )
+        count = connection.execute(
+            'SELECT COUNT(*) FROM cache_entries'
+        ).fetchone()[0]
+        if count <= self._max_entries:
+            return
+        if not self._cull_frequency:
+            connection.execute('DELETE FROM cache_entries')
+            return
+        connection.execute(
+            'DELETE FROM cache_entries WHERE key IN ('
+            'SELECT key FROM cache_entries '
+            'ORDER BY expires IS NULL, expires LIMIT ?)',
+            [count // self._cull_frequency]
+        )
+
+    def _key(self, key, version) -> str:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _read(self, keys) -> dict:
+        """Сериализованные значения ключей: из памяти, иначе из файла."""
+        connection = self._connection()
+        self._sync(connection)
+        found, missing = {}, []
+        for key in keys:
+            pickled = self.local.get(key)
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickled
+        now = time.time()
+        # Пока блокировка занята, журнал не применяется: изменение,
+        # зафиксированное после SELECT, вытеснит прочитанное значение
+        # при следующей сверке.
+        with self.local.lock:
+            for chunk in _chunks(missing):
+                for key, pickled, expires in connection.execute(
+                    'SELECT key, value, expires FROM cache_entries '
+                    f"WHERE key IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ):
+                    if not _expired(expires, now):
+                        found[key] = pickled
+                        self.local.set(key, pickled, expires)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        pickled = self._read([key]).get(key)
+        return default if pickled is None else pickle.loads(pickled)
+
+    def get_many(self, keys, version=None) -> dict:
+        made = {self._key(key, version): key for key in keys}
+        return {
+            made[key]: pickle.loads(pickled)
+            for key, pickled in self._read(list(made)).items()
+        }
+
+    def has_key(self, key, version=None) -> bool:
+        key = self._key(key, version)
+        return key in self._read([key])
+
+    def _store(self, items, timeout, only_new=False) -> list:
+        """Записывает пары (ключ, значение). Возвращает записанные ключи."""
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires)
+            for key, value in items
+        ]
+        stored = []
+        with self._transaction() as connection:
+            self._cull(connection)
+            for row in rows:
+                if only_new:
+                    connection.execute(
+                        'DELETE FROM cache_entries '
+                        'WHERE key = ? AND expires <= ?',
+                        [row[0], time.time()]
+                    )
+                    cursor = connection.execute(
+                        'INSERT OR IGNORE INTO cache_entries '
+                        '(key, value, expires) VALUES (?, ?, ?)', row
+                    )
+                    if not cursor.rowcount:
+                        continue
+                else:
+                    connection.execute(
+                        'INSERT OR REPLACE INTO cache_entries '
+                        '(key, value, expires) VALUES (?, ?, ?)', row
+                    )
+                stored.append(row)
+            self._invalidate(connection, [row[0] for row in stored])
+            # До COMMIT: чужая запись тех же ключей попадёт в журнал
+            # позже и вытеснит эти значения.
+            for row in stored:
+                self.local.set(*row)
+        return [row[0] for row in stored]
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self._key(key, version)
+        return bool(self._store([(key, value)], timeout, only_new=True))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        self._store([(self._key(key, version), value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None) -> list:
+        self._store(
+            [(self._key(key, version), value) for key, value in data.items()],
+            timeout
+        )
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self._key(key, version)
+        expires = self.get_backend_timeout(timeout)
+        with self._transaction() as connection:
+            touched = connection.execute(
+                'UPDATE cache_entries SET expires = ? WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                [expires, key, time.time()]
+            ).rowcount
+            if touched:
+                self._invalidate(connection, [key])
+        self.local.discard([key])
+        return bool(touched)
+
+    def incr(self, key, delta=1, version=None) -> int:
+        """Атомарно для всех процессов: под блокировкой записи SQLite."""
+        key = self._key(key, version)
+        with self._transaction() as connection:
+            row = connection.execute(
+                'SELECT value, expires FROM cache_entries WHERE key = ?',
+                [key]
+            ).fetchone()
+            if row is None or _expired(row[1]):
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute(
+                'UPDATE cache_entries SET value = ? WHERE key = ?',
+                [pickled, key]
+            )
+            self._invalidate(connection, [key])
+            self.local.set(key, pickled, row[1])
+        return value
+
+    def delete_many(self, keys, version=None) -> None:
+        keys = [self._key(key, version) for key in keys]
+        with self._transaction() as connection:
+            for chunk in _chunks(keys):
+                connection.execute(
+                    'DELETE FROM cache_entries '
+                    f"WHERE key IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                )
+            self._invalidate(connection, keys)
+        self.local.discard(keys)
+
+    def delete(self, key, version=None) -> None:
+        self.delete_many([key], version)
+
+    def clear(self) -> None:
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM cache_entries')
+            self._invalidate(connection, [None])
+        self.local.clear()
+
+    def close(self, **kwargs) -> None:
+        # Подключение живёт столько же, сколько поток.
+        pass
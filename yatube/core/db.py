@@ -0,0 +1,19 @@
+from django.conf import settings
+
+
+def pragma_statements(pragmas) -> list:
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs) -> None:
+    """
+    Настраивает каждое новое подключение к SQLite (SQLITE_PRAGMAS).
+
+    WAL позволяет читать во время записи, busy_timeout заставляет
+    писателей ждать блокировку вместо ошибки "database is locked".
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
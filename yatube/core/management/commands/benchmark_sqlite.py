@@ -0,0 +1,120 @@
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import pragma_statements
+
+SCHEMA = (
+    'CREATE TABLE comment ('
+    'id INTEGER PRIMARY KEY, post_id INTEGER, text TEXT, created REAL)'
+)
+CREATE_INDEX = 'CREATE INDEX comment_post ON comment (post_id, id)'
+INSERT = 'INSERT INTO comment (post_id, text, created) VALUES (?, ?, ?)'
+SELECT = (
+    'SELECT id, text FROM comment WHERE post_id = ? '
+    'ORDER BY id DESC LIMIT 20'
+)
+POSTS = 100
+
+
+class Worker(threading.Thread):
+    def __init__(self, path, pragmas, persistent, deadline, write_ratio):
+        super().__init__()
+        self.path = path
+        self.pragmas = pragmas
+        self.persistent = persistent
+        self.deadline = deadline
+        self.write_ratio = write_ratio
+        self.operations = self.errors = 0
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, isolation_level=None)
+        for statement in pragma_statements(self.pragmas):
+            connection.execute(statement)
+        return connection
+
+    def operation(self, connection) -> None:
+        post_id = random.randrange(POSTS)
+        if random.random() < self.write_ratio:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute(INSERT, (post_id, 'x' * 200, time.time()))
+            connection.execute('COMMIT')
+        else:
+            connection.execute(SELECT, (post_id,)).fetchall()
+
+    def run(self) -> None:
+        connection = self.connect() if self.persistent else None
+        while time.monotonic() < self.deadline:
+            current = connection or self.connect()
+            try:
+                self.operation(current)
+                self.operations += 1
+            except sqlite3.OperationalError:
+                self.errors += 1
+                if current.in_transaction:
+                    current.execute('ROLLBACK')
+            finally:
+                if not self.persistent:
+                    current.close()
+        if connection:
+            connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite по умолчанию и с '
+        'настройками SQLITE_PRAGMAS при конкурентных чтениях и записях'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument(
+            '--write-ratio', type=float, default=0.2,
+            help='Доля операций записи'
+        )
+
+    def measure(self, pragmas, persistent, options) -> tuple:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'benchmark.sqlite3')
+            connection = sqlite3.connect(path, isolation_level=None)
+            connection.execute(SCHEMA)
+            connection.execute(CREATE_INDEX)
+            connection.close()
+            deadline = time.monotonic() + options['seconds']
+            workers = [
+                Worker(
+                    path, pragmas, persistent, deadline,
+                    options['write_ratio']
+                )
+                for _ in range(options['threads'])
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        operations = sum(worker.operations for worker in workers)
+        errors = sum(worker.errors for worker in workers)
+        return operations / options['seconds'], errors
+
+    def handle(self, *args, **options):
+        results = {}
+        for name, pragmas, persistent in (
+            ('по умолчанию', {}, False),
+            ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS, True),
+        ):
+            results[name] = self.measure(pragmas, persistent, options)
+            throughput, errors = results[name]
+            self.stdout.write(
+                f'{name}: {throughput:.0f} операций/с, '
+                f'ошибок блокировки: {errors}'
+            )
+        baseline, tuned = (throughput for throughput, _ in results.values())
+        if baseline:
+            self.stdout.write(f'Ускорение: {tuned / baseline:.1f}x')
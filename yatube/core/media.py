@@ -0,0 +1,143 @@
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified
+)
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.static import was_modified_since
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """
+    Часть открытого файла для ответа 206.
+
+    fileno() оставлен, чтобы WSGI-сервер мог отдать отрезок через
+    sendfile() с текущей позиции; без него файл читается блоками.
+    """
+
+    def __init__(self, file, start, length) -> None:
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def read(self, size=-1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def parse_range(header, size) -> object:
+    """
+    (начало, конец) из заголовка Range или None, если отдаётся весь файл.
+
+    Поддерживается один отрезок; для нескольких отдаётся весь файл.
+    Для недостижимого отрезка — ValueError.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def cache_control(path) -> str:
+    """Неизменяемые имена (хеш содержимого) кешируются навсегда."""
+    if any(
+        re.match(pattern, path)
+        for pattern in settings.MEDIA_IMMUTABLE_PATTERNS
+    ):
+        return IMMUTABLE_CACHE_CONTROL
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def offload(path, fullpath) -> HttpResponse:
+    """Пустой ответ: файл отдаст фронтовой сервер по заголовку."""
+    response = HttpResponse()
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header == 'X-Accel-Redirect':
+        response[header] = settings.MEDIA_ACCEL_PREFIX + path
+    else:
+        response[header] = fullpath
+    # Тип выставит сервер по расширению файла.
+    del response['Content-Type']
+    return response
+
+
+def file_response(request, fullpath, stat) -> HttpResponse:
+    content_type = mimetypes.guess_type(fullpath)[0]
+    content_type = content_type or 'application/octet-stream'
+    if_range = request.META.get('HTTP_IF_RANGE')
+    try:
+        byte_range = None
+        if not if_range or (
+            parse_http_date_safe(if_range) == int(stat.st_mtime)
+        ):
+            byte_range = parse_range(
+                request.META.get('HTTP_RANGE'), stat.st_size
+            )
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if byte_range is None:
+        return FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    start, end = byte_range
+    response = FileResponse(
+        FileRange(open(fullpath, 'rb'), start, end - start + 1),
+        status=206, content_type=content_type
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    return response
+
+
+def serve(request, path, document_root=None) -> HttpResponse:
+    """
+    Раздача загруженных файлов.
+
+    Если задан MEDIA_SENDFILE_HEADER, файл отдаёт фронтовой сервер
+    (X-Sendfile или X-Accel-Redirect), а Django только проверяет путь.
+    Иначе — FileResponse, который WSGI-сервер передаёт через sendfile(),
+    с поддержкой Range и If-Modified-Since.
+    """
+    path = posixpath.normpath(path).lstrip('/')
+    fullpath = safe_join(document_root or settings.MEDIA_ROOT, path)
+    if not os.path.isfile(fullpath):
+        raise Http404(f'"{path}" не существует')
+    stat = os.stat(fullpath)
+    if not was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime, stat.st_size
+    ):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_SENDFILE_HEADER:
+        response = offload(path, fullpath)
+    else:
+        response = file_response(request, fullpath, stat)
+        response['Accept-Ranges'] = 'bytes'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = cache_control(path)
+    return response
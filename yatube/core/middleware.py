@@ -0,0 +1,38 @@
+from django.conf import settings
+
+from .routers import use_primary, wrote
+
+PRIMARY_COOKIE = 'use_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ReplicaStickinessMiddleware:
+    """
+    Закрепляет чтение за основной базой после записи.
+
+    Небезопасные запросы целиком идут в default. Если запрос что-то
+    записал, на REPLICA_STICKINESS_SECONDS ставится cookie, и следующие
+    запросы пользователя тоже читают с default, пока реплики догоняют.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        primary_token = use_primary.set(
+            request.method not in SAFE_METHODS
+            or PRIMARY_COOKIE in request.COOKIES
+        )
+        wrote_token = wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if wrote.get():
+                response.set_cookie(
+                    PRIMARY_COOKIE, '1',
+                    max_age=settings.REPLICA_STICKINESS_SECONDS,
+                    httponly=True, samesite='Lax'
+                )
+            return response
+        finally:
+            use_primary.reset(primary_token)
+            wrote.reset(wrote_token)
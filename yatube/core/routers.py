@@ -0,0 +1,52 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+# Чтение с основной базы. Вне HTTP-запросов (команды, фоновые задачи)
+# включено: реплики открывает только ReplicaStickinessMiddleware.
+use_primary = ContextVar('use_primary', default=True)
+# В текущем HTTP-запросе была запись.
+wrote = ContextVar('wrote', default=False)
+
+
+class ReplicaRouter:
+    """
+    Чтение — с одной из реплик DATABASE_REPLICAS, запись — в default.
+
+    Чтение остаётся на основной базе внутри транзакции, вне HTTP-запросов
+    и там, где ReplicaStickinessMiddleware закрепил запрос за ней, чтобы
+    пользователь сразу видел свои записи.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (
+            not replicas or use_primary.get()
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def primary_reads(enabled=True):
+    """Закрепляет чтение внутри блока за основной базой."""
+    token = use_primary.set(enabled or use_primary.get())
+    try:
+        yield
+    finally:
+        use_primary.reset(token)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+TEST_CACHE_LOCATION = 'file:yatube-test-cache?mode=memory&cache=shared'
+
+
+def test_settings() -> override_settings:
+    """
+    Настройки на время тестов.
+
+    Кеш — общая база SQLite в памяти вместо файла разработки, фоновые
+    задачи выполняются в текущем потоке и не переживают тест.
+    """
+    return override_settings(
+        BACKGROUND_WORKERS=0,
+        CACHES={
+            alias: {**options, 'LOCATION': TEST_CACHE_LOCATION}
+            for alias, options in settings.CACHES.items()
+        },
+    )
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs) -> None:
+        super().setup_test_environment(**kwargs)
+        self.test_settings = test_settings()
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs) -> None:
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
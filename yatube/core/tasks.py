@@ -0,0 +1,49 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+_executor = None
+
+
+def _executor_instance() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_WORKERS,
+            thread_name_prefix='yatube-worker'
+        )
+    return _executor
+
+
+def _call(func, args, kwargs) -> None:
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Фоновая задача %s завершилась ошибкой', func)
+
+
+def _run(func, args, kwargs) -> None:
+    try:
+        _call(func, args, kwargs)
+    finally:
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs) -> None:
+    """
+    Выполняет функцию в локальном пуле потоков процесса.
+
+    Задача ставится после фиксации текущей транзакции, чтобы поток видел
+    сохранённые данные. Без внешнего брокера: задачи, не успевшие
+    выполниться до остановки процесса, теряются.
+    При BACKGROUND_WORKERS = 0 задача выполняется в текущем потоке.
+    """
+    if not settings.BACKGROUND_WORKERS:
+        transaction.on_commit(lambda: _call(func, args, kwargs))
+        return
+    transaction.on_commit(
+        lambda: _executor_instance().submit(_run, func, args, kwargs)
+    )
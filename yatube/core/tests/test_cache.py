@@ -0,0 +1,63 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from core.cache import LocalTier, TwoTierCache
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        location = os.path.join(directory, 'cache.sqlite3')
+        self.cache = TwoTierCache(location, {})
+        # Второй процесс: тот же файл, свой локальный уровень.
+        self.other = TwoTierCache(location, {})
+        self.other.local = LocalTier()
+
+    def test_shared_between_processes(self):
+        """Запись одного процесса видна другому."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.other.get('key'), {'value': 1})
+        self.assertEqual(self.other.get_many(['key', 'missing']), {
+            'key': {'value': 1}
+        })
+
+    def test_invalidation_propagates(self):
+        """Изменение в одном процессе вытесняет копию в памяти другого."""
+        self.cache.set('key', 'old')
+        self.assertEqual(self.other.get('key'), 'old')
+        self.cache.set('key', 'new')
+        self.assertEqual(self.other.get('key'), 'new')
+        self.assertTrue(self.other.add('counter', 1))
+        self.assertEqual(self.cache.incr('counter'), 2)
+        self.assertEqual(self.other.get('counter'), 2)
+        self.cache.delete('key')
+        self.assertIsNone(self.other.get('key'))
+        self.other.set('key', 'again')
+        self.cache.clear()
+        self.assertIsNone(self.other.get('key'))
+
+    def test_incr_missing_key(self):
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_add_and_expiry(self):
+        self.assertTrue(self.cache.add('key', 1))
+        self.assertFalse(self.other.add('key', 2))
+        self.cache.set('expired', 1, timeout=-1)
+        self.assertIsNone(self.other.get('expired'))
+        self.assertTrue(self.other.add('expired', 2))
+        self.assertEqual(self.cache.get('expired'), 2)
+
+    def test_local_tier_evicts_by_size(self):
+        """Локальный уровень вытесняет давно не читанные значения."""
+        tier = LocalTier(max_bytes=3 * 101)
+        for key in ('a', 'b', 'c'):
+            tier.set(key, b'x' * 100, None)
+        tier.get('a')
+        tier.set('d', b'x' * 100, None)
+        self.assertEqual(list(tier.entries), ['c', 'a', 'd'])
+        self.assertEqual(tier.size, 3 * 101)
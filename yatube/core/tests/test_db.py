@@ -0,0 +1,17 @@
+from django.db import connection
+from django.test import TestCase
+
+
+class SQLitePragmasTests(TestCase):
+    def test_pragmas_applied(self):
+        """Новое подключение получает настройки SQLITE_PRAGMAS."""
+        with connection.cursor() as cursor:
+            for pragma, expected in (
+                ('synchronous', 1),
+                ('busy_timeout', 5000),
+                ('cache_size', -64 * 1024),
+                ('temp_store', 2),
+            ):
+                with self.subTest(pragma=pragma):
+                    cursor.execute(f'PRAGMA {pragma}')
+                    self.assertEqual(cursor.fetchone()[0], expected)
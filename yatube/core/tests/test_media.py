@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import Client, override_settings, TestCase
+from django.utils.http import http_date
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+CONTENT = bytes(range(256)) * 4
+THUMBNAIL = 'cache/ab/cd/abcdef.jpg'
+UPLOAD = 'legacy/photo.jpg'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaServeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in (THUMBNAIL, UPLOAD):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest = Client()
+
+    def url(self, name) -> str:
+        return settings.MEDIA_URL + name
+
+    def test_file_response(self):
+        """Файл отдаётся целиком с датой изменения и кешем."""
+        response = self.guest.get(self.url(UPLOAD))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('Last-Modified', response)
+        self.assertNotIn('immutable', response['Cache-Control'])
+
+    def test_immutable_cache_control(self):
+        """Миниатюры кешируются навсегда."""
+        response = self.guest.get(self.url(THUMBNAIL))
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_range(self):
+        """Range отдаёт запрошенный отрезок со статусом 206."""
+        cases = {
+            'bytes=10-19': (CONTENT[10:20], 'bytes 10-19/1024'),
+            'bytes=1000-': (CONTENT[1000:], 'bytes 1000-1023/1024'),
+            'bytes=-4': (CONTENT[-4:], 'bytes 1020-1023/1024'),
+        }
+        for header, (body, content_range) in cases.items():
+            with self.subTest(header=header):
+                response = self.guest.get(
+                    self.url(UPLOAD), HTTP_RANGE=header
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                self.assertEqual(b''.join(response.streaming_content), body)
+                self.assertEqual(response['Content-Range'], content_range)
+                self.assertEqual(int(response['Content-Length']), len(body))
+
+    def test_unsatisfiable_range(self):
+        response = self.guest.get(self.url(UPLOAD), HTTP_RANGE='bytes=2000-')
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+
+    def test_not_modified(self):
+        """If-Modified-Since с актуальной датой даёт 304."""
+        mtime = os.stat(os.path.join(TEMP_MEDIA_ROOT, UPLOAD)).st_mtime
+        response = self.guest.get(
+            self.url(UPLOAD), HTTP_IF_MODIFIED_SINCE=http_date(mtime)
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_missing_and_outside_files(self):
+        cases = {
+            'missing.jpg': HTTPStatus.NOT_FOUND,
+            'legacy': HTTPStatus.NOT_FOUND,
+            '../settings.py': HTTPStatus.BAD_REQUEST,
+        }
+        for name, status in cases.items():
+            with self.subTest(name=name):
+                self.assertEqual(
+                    self.guest.get(self.url(name)).status_code, status
+                )
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect')
+    def test_accel_redirect(self):
+        """С X-Accel-Redirect тело отдаёт nginx."""
+        response = self.guest.get(self.url(UPLOAD))
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            settings.MEDIA_ACCEL_PREFIX + UPLOAD
+        )
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_SENDFILE_HEADER='X-Sendfile')
+    def test_sendfile(self):
+        response = self.guest.get(self.url(UPLOAD))
+        self.assertEqual(
+            response['X-Sendfile'], os.path.join(TEMP_MEDIA_ROOT, UPLOAD)
+        )
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, override_settings, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.middleware import PRIMARY_COOKIE
+from core.routers import ReplicaRouter, use_primary
+from posts.feed_cache import bump, INDEX_SCOPE
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_replica(self):
+        token = use_primary.set(False)
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'replica1')
+        finally:
+            use_primary.reset(token)
+
+    def test_reads_outside_request_go_to_primary(self):
+        """Команды и фоновые задачи не читают с реплик."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_without_replicas_reads_go_to_primary(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_pinned_reads_go_to_primary(self):
+        token = use_primary.set(True)
+        try:
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        finally:
+            use_primary.reset(token)
+
+    def test_writes_and_migrations_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+        self.assertFalse(self.router.allow_migrate('replica1', 'posts'))
+
+
+class ReplicaStickinessTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_write_sets_primary_cookie(self):
+        """После записи пользователь временно читает с основной базы."""
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Новый пост'}
+        )
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+
+    def test_read_does_not_set_primary_cookie(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class RecentBumpTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reads = []
+        db_for_read = ReplicaRouter.db_for_read
+
+        def record(router, model, **hints):
+            self.reads.append(use_primary.get())
+            return db_for_read(router, model, **hints)
+
+        patcher = mock.patch.object(ReplicaRouter, 'db_for_read', record)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_page_reads_replica(self):
+        self.client.get(reverse('posts:index'))
+        self.assertIn(False, self.reads)
+
+    def test_recent_bump_pins_page_to_primary(self):
+        """Сразу после смены поколения страница строится по default."""
+        bump(INDEX_SCOPE)
+        self.client.get(reverse('posts:index'))
+        self.assertTrue(self.reads)
+        self.assertNotIn(False, self.reads)
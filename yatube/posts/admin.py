@@ -1,6 +1,55 @@
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
-from .models import Comment, Follow, Group, Post
+from . import deletion, search
+from .models import (
+    ArchivedPost, Comment, DeletionJob, Follow, Group, Post, User
+)
+
+
+class DeferredDeletionMixin:
+    """
+    Удаление из админки через фоновую задачу DeletionJob.
+
+    Страница подтверждения не собирает связанные объекты: для автора
+    с большим числом постов это само по себе долгий запрос. Права на
+    то, что затронет задача, проверяются по моделям её этапов.
+    """
+    schedule_deletion = None
+    deletion_steps = None
+
+    def get_deleted_objects(self, objs, request):
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            self.missing_permissions(request),
+            [],
+        )
+
+    def missing_permissions(self, request) -> set:
+        """Модели этапов, которые пользователь не вправе удалять (менять)."""
+        missing = set()
+        for _, queryset, action in self.deletion_steps(None):
+            model_admin = self.admin_site._registry.get(queryset.model)
+            if model_admin is None:
+                continue
+            if action is deletion.detach_from_group:
+                allowed = model_admin.has_change_permission(request)
+            else:
+                allowed = model_admin.has_delete_permission(request)
+            if not allowed:
+                missing.add(queryset.model._meta.verbose_name)
+        return missing
+
+    def delete_model(self, request, obj):
+        self.schedule_deletion(obj)
+        self.message_user(
+            request, f'Удаление «{obj}» выполняется в фоне'
+        )
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.schedule_deletion(obj)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -16,6 +65,11 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.filter_posts(queryset, search_term), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = (
@@ -28,7 +82,48 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
 
 
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'pub_date',
+        'author',
+        'group',
+    )
+    list_filter = ('pub_date',)
+    empty_value_display = '-пусто-'
+
+
+class GroupAdmin(DeferredDeletionMixin, admin.ModelAdmin):
+    schedule_deletion = staticmethod(deletion.schedule_group_deletion)
+    deletion_steps = staticmethod(deletion.group_steps)
+
+
+class DeferredDeletionUserAdmin(DeferredDeletionMixin, UserAdmin):
+    schedule_deletion = staticmethod(deletion.schedule_user_deletion)
+    deletion_steps = staticmethod(deletion.user_steps)
+
+
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'label',
+        'stage',
+        'processed',
+        'created',
+        'finished',
+    )
+    list_filter = ('kind', 'finished')
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
+admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow)
+admin.site.register(DeletionJob, DeletionJobAdmin)
+# Импорт django.contrib.auth.admin выше уже зарегистрировал User.
+admin.site.unregister(User)
+admin.site.register(User, DeferredDeletionUserAdmin)
@@ -0,0 +1,111 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.http import Http404
+from django.utils import timezone
+
+from . import counters, feed_cache
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Group, Post, TimelineEntry, User
+)
+from .paginators import ChainedFeed
+from .settings import ARCHIVE_AFTER_DAYS
+
+BATCH_SIZE = 500
+POST_COLUMNS = [field.attname for field in ArchivedPost._meta.concrete_fields]
+COMMENT_COLUMNS = [
+    field.attname for field in ArchivedComment._meta.concrete_fields
+]
+
+
+def horizon(days=ARCHIVE_AFTER_DAYS) -> object:
+    """Посты, опубликованные раньше этого момента, уходят в архив."""
+    return timezone.now() - timedelta(days=days)
+
+
+def resolve_post(post_id, *related) -> object:
+    """Пост из рабочей таблицы, а если его там нет — из архива."""
+    for model in (Post, ArchivedPost):
+        post = model.objects.select_related(*related).filter(
+            pk=post_id
+        ).first()
+        if post is not None:
+            return post
+    raise Http404(f'Пост {post_id} не найден')
+
+
+def author_feed(author) -> ChainedFeed:
+    """Все посты автора: сначала рабочая таблица, затем архив."""
+    return ChainedFeed(
+        author.posts.for_feed(), author.archived_posts.for_feed()
+    )
+
+
+def _raw_delete(queryset) -> None:
+    # Без сигналов: файлы, счётчики и поисковый индекс переезжают
+    # вместе с постом, а не освобождаются.
+    queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def move_batch(post_ids) -> list:
+    """
+    Переносит посты с комментариями в архив. Возвращает их строки.
+
+    Вызывается внутри транзакции.
+    """
+    posts = list(Post.objects.filter(pk__in=post_ids).values(*POST_COLUMNS))
+    ArchivedPost.objects.bulk_create(
+        ArchivedPost(**row) for row in posts
+    )
+    ArchivedComment.objects.bulk_create(
+        ArchivedComment(**row) for row in Comment.objects.filter(
+            post_id__in=post_ids
+        ).values(*COMMENT_COLUMNS).iterator()
+    )
+    # ImportedPost хранит id без внешнего ключа и остаётся на месте.
+    for model in (TimelineEntry, Comment):
+        _raw_delete(model.objects.filter(post_id__in=post_ids))
+    _raw_delete(Post.objects.filter(pk__in=post_ids))
+    # Ленты групп показывают только рабочую таблицу, ленты авторов —
+    # обе, поэтому счётчик меняется только у групп.
+    for group_id, moved in Counter(
+        row['group_id'] for row in posts if row['group_id']
+    ).items():
+        counters.change_group(group_id, -moved)
+    return posts
+
+
+def invalidate(posts) -> None:
+    authors = User.objects.filter(
+        pk__in={row['author_id'] for row in posts}
+    ).values_list('username', flat=True)
+    groups = Group.objects.filter(
+        pk__in={row['group_id'] for row in posts}
+    ).values_list('slug', flat=True)
+    feed_cache.bump(
+        feed_cache.INDEX_SCOPE,
+        *map(feed_cache.author_scope, authors),
+        *map(feed_cache.group_scope, groups),
+        *(feed_cache.post_scope(row['id']) for row in posts),
+    )
+
+
+def archive_posts(before, batch_size=BATCH_SIZE) -> int:
+    """
+    Переносит в архив посты, опубликованные до before.
+
+    Каждая порция — отдельная транзакция, поэтому прерванный перенос
+    можно просто запустить снова. Возвращает число перенесённых постов.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            post_ids = list(Post.objects.filter(
+                pub_date__lt=before
+            ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not post_ids:
+                return moved
+            posts = move_batch(post_ids)
+        invalidate(posts)
+        moved += len(posts)
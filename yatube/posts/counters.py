@@ -0,0 +1,152 @@
+from collections import Counter
+from functools import reduce
+from operator import add
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (
+    ArchivedComment, ArchivedPost, AuthorCounters, Comment, Follow, Group,
+    Post, User
+)
+
+CHUNK_SIZE = 1000
+# Посты и комментарии автора считаются вместе с архивными.
+AUTHOR_COUNTERS = {
+    'posts_count': ((Post, 'author'), (ArchivedPost, 'author')),
+    'followers_count': ((Follow, 'author'),),
+    'following_count': ((Follow, 'user'),),
+    'comments_count': ((Comment, 'author'), (ArchivedComment, 'author')),
+}
+
+
+def _deltas(**deltas) -> dict:
+    return {name: F(name) + delta for name, delta in deltas.items()}
+
+
+def change_author(author_id, **deltas) -> None:
+    """
+    Атомарно изменяет счётчики автора.
+
+    Недостающая строка создаётся только при увеличении: уменьшение
+    происходит и при каскадном удалении самого пользователя.
+    """
+    if AuthorCounters.objects.filter(author_id=author_id).update(
+        **_deltas(**deltas)
+    ) or min(deltas.values()) < 0:
+        return
+    AuthorCounters.objects.get_or_create(author_id=author_id)
+    AuthorCounters.objects.filter(author_id=author_id).update(
+        **_deltas(**deltas)
+    )
+
+
+def change_group(group_id, delta) -> None:
+    if group_id is not None:
+        Group.objects.filter(pk=group_id).update(
+            posts_count=F('posts_count') + delta
+        )
+
+
+def change_post(post_id, delta) -> None:
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def count_created_posts(posts) -> None:
+    """Учитывает посты из bulk_create: он не отправляет сигналов."""
+    for author_id, total in Counter(post.author_id for post in posts).items():
+        change_author(author_id, posts_count=total)
+    for group_id, total in Counter(post.group_id for post in posts).items():
+        change_group(group_id, total)
+
+
+def _count(model, field) -> Coalesce:
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField()
+    ), 0)
+
+
+def _chunks(queryset, pks=None):
+    """Обходит queryset порциями по первичному ключу (или только pks)."""
+    if pks is not None:
+        pks = sorted(pks)
+        for start in range(0, len(pks), CHUNK_SIZE):
+            yield list(queryset.filter(
+                pk__in=pks[start:start + CHUNK_SIZE]
+            ).order_by('pk'))
+        return
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[
+            :CHUNK_SIZE
+        ])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def recount_authors(author_ids=None) -> int:
+    """
+    Пересчитывает счётчики авторов (всех или author_ids).
+
+    Возвращает число исправленных.
+    """
+    repaired = 0
+    fields = list(AUTHOR_COUNTERS)
+    for users in _chunks(User.objects.annotate(**{
+        f'real_{name}': reduce(add, (
+            _count(model, field) for model, field in sources
+        ))
+        for name, sources in AUTHOR_COUNTERS.items()
+    }).only('pk'), author_ids):
+        stored = AuthorCounters.objects.in_bulk([user.pk for user in users])
+        missing, drifted = [], []
+        for user in users:
+            counters = stored.get(user.pk) or AuthorCounters(author=user)
+            real = {name: getattr(user, f'real_{name}') for name in fields}
+            if all(getattr(counters, name) == value
+                   for name, value in real.items()) and user.pk in stored:
+                continue
+            for name, value in real.items():
+                setattr(counters, name, value)
+            (drifted if user.pk in stored else missing).append(counters)
+        AuthorCounters.objects.bulk_create(missing, ignore_conflicts=True)
+        AuthorCounters.objects.bulk_update(drifted, fields)
+        repaired += len(missing) + len(drifted)
+    return repaired
+
+
+def recount_groups() -> int:
+    """Пересчитывает число постов групп. Возвращает число исправленных."""
+    repaired = 0
+    for groups in _chunks(Group.objects.annotate(
+        real_posts_count=_count(Post, 'group')
+    ).only('pk', 'posts_count')):
+        drifted = [group for group in groups
+                   if group.posts_count != group.real_posts_count]
+        for group in drifted:
+            group.posts_count = group.real_posts_count
+        Group.objects.bulk_update(drifted, ['posts_count'])
+        repaired += len(drifted)
+    return repaired
+
+
+def recount_posts(post_ids=None) -> int:
+    """Пересчитывает число комментариев постов (всех или post_ids)."""
+    repaired = 0
+    for posts in _chunks(Post.objects.annotate(
+        real_comments_count=_count(Comment, 'post')
+    ).only('pk', 'comments_count'), post_ids):
+        drifted = [post for post in posts
+                   if post.comments_count != post.real_comments_count]
+        for post in drifted:
+            post.comments_count = post.real_comments_count
+        Post.objects.bulk_update(drifted, ['comments_count'])
+        repaired += len(drifted)
+    return repaired
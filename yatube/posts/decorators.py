@@ -0,0 +1,103 @@
+from functools import wraps
+from hashlib import md5
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag, urlencode
+
+from core.routers import primary_reads
+
+from .feed_cache import generations, recently_bumped
+from .settings import PAGE_CACHE_TIMEOUT
+
+PAGE_CACHE_KEY = 'anonymous-page:{}:{}'
+PAGE_PARAMS = ('page', 'cursor')
+
+
+def newest_pub_date(context) -> object:
+    """Самая свежая дата публикации среди выведенных на странице записей."""
+    records = list(context.get('page_obj') or ())
+    if context.get('post') is not None:
+        records.append(context['post'])
+        records.extend(context.get('comments') or ())
+    return max((record.pub_date for record in records), default=None)
+
+
+def _conditional_headers(response, etag, last_modified) -> HttpResponse:
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def page_key(request, params) -> str:
+    """
+    Адрес страницы для ключа кеша: путь и только параметры из params.
+
+    Прочие параметры view не читает, и произвольные строки запроса не
+    размножают записи в кеше.
+    """
+    query = urlencode(sorted(
+        (name, request.GET[name]) for name in params if name in request.GET
+    ))
+    return md5(f'{request.path}?{query}'.encode()).hexdigest()
+
+
+def anonymous_page_cache(scopes, params=PAGE_PARAMS):
+    """
+    Кеширует страницу целиком для анонимных пользователей.
+
+    scopes(**kwargs) возвращает области feed_cache, от поколений которых
+    зависит страница, params — параметры запроса, которые читает view.
+    Повторный запрос с совпадающим ETag или If-Modified-Since получает
+    304 без выполнения view. Вскоре после смены поколения страница (и
+    фрагменты её шаблона) строится по основной базе, а не по реплике.
+    Декорируемый view должен возвращать TemplateResponse.
+    """
+    def decorator(view):
+        def cached_view(request, page_scopes, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            key = PAGE_CACHE_KEY.format(
+                '.'.join(map(str, generations(*page_scopes))),
+                page_key(request, params)
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                content, content_type, etag, last_modified = cached
+                return get_conditional_response(
+                    request, etag=etag, last_modified=last_modified
+                ) or _conditional_headers(
+                    HttpResponse(content, content_type=content_type),
+                    etag,
+                    last_modified
+                )
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            pub_date = newest_pub_date(response.context_data)
+            last_modified = pub_date and int(pub_date.timestamp())
+            response.render()
+            etag = quote_etag(md5(response.content).hexdigest())
+            cache.set(key, (
+                response.content, response['Content-Type'], etag,
+                last_modified
+            ), PAGE_CACHE_TIMEOUT)
+            return get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            ) or _conditional_headers(response, etag, last_modified)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            page_scopes = scopes(**kwargs)
+            with primary_reads(recently_bumped(*page_scopes)):
+                response = cached_view(request, page_scopes, *args, **kwargs)
+                # Шаблон читает ленту лениво: рендерим внутри блока.
+                if isinstance(response, SimpleTemplateResponse):
+                    response.render()
+                return response
+        return wrapper
+    return decorator
@@ -0,0 +1,136 @@
+from django.db import router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.tasks import submit
+
+from . import feed_cache
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, DeletionJob, Follow, Group, Post,
+    TimelineEntry, User
+)
+
+BATCH_SIZE = 500
+
+
+def delete_rows(queryset) -> int:
+    """Удаляет порцию обычным delete(): сигналы и каскады те же."""
+    return queryset.delete()[0]
+
+
+def detach_from_group(posts) -> int:
+    """SET_NULL порцией: UPDATE без сигналов, кеш сбрасывается здесь."""
+    rows = list(posts.values_list('pk', 'author__username'))
+    feed_cache.bump(
+        *{feed_cache.author_scope(username) for _, username in rows},
+        *(feed_cache.post_scope(pk) for pk, _ in rows)
+    )
+    return posts.update(group=None)
+
+
+def user_steps(user_id) -> list:
+    """
+    Этапы удаления пользователя.
+
+    Сначала порциями удаляется всё, что ссылается на пользователя, и
+    последним — сам пользователь, у которого к этому моменту остаются
+    только строки с ограниченным числом записей. Чужие комментарии к его
+    постам удаляются отдельным этапом, иначе каскад от порции постов
+    был бы неограниченным.
+    """
+    return [
+        ('follows', Follow.objects.filter(
+            Q(user_id=user_id) | Q(author_id=user_id)
+        ), delete_rows),
+        ('timeline', TimelineEntry.objects.filter(user_id=user_id),
+         delete_rows),
+        ('comments', Comment.objects.filter(author_id=user_id), delete_rows),
+        ('archived_comments', ArchivedComment.objects.filter(
+            author_id=user_id
+        ), delete_rows),
+        ('post_comments', Comment.objects.filter(post__author_id=user_id),
+         delete_rows),
+        ('archived_post_comments', ArchivedComment.objects.filter(
+            post__author_id=user_id
+        ), delete_rows),
+        ('posts', Post.objects.filter(author_id=user_id), delete_rows),
+        ('archived_posts', ArchivedPost.objects.filter(author_id=user_id),
+         delete_rows),
+        ('user', User.objects.filter(pk=user_id), delete_rows),
+    ]
+
+
+def group_steps(group_id) -> list:
+    return [
+        ('posts', Post.objects.filter(group_id=group_id), detach_from_group),
+        ('archived_posts', ArchivedPost.objects.filter(group_id=group_id),
+         detach_from_group),
+        ('group', Group.objects.filter(pk=group_id), delete_rows),
+    ]
+
+
+STEPS = {
+    DeletionJob.USER: user_steps,
+    DeletionJob.GROUP: group_steps,
+}
+
+
+def run_job(job_id, batch_size=BATCH_SIZE) -> None:
+    """
+    Выполняет задачу удаления порциями по batch_size строк.
+
+    Каждая порция — отдельная транзакция с обновлением прогресса, поэтому
+    база не блокируется надолго, а прерванную задачу можно запустить
+    снова: уже удалённые строки просто не найдутся.
+    """
+    # Задачу только что создали: реплика могла её ещё не получить.
+    job = DeletionJob.objects.using(
+        router.db_for_write(DeletionJob)
+    ).filter(pk=job_id, finished=None).first()
+    if job is None:
+        return
+    for stage, queryset, action in STEPS[job.kind](job.object_id):
+        while True:
+            # Внутри транзакции id читаются с основной базы, а не с реплики.
+            with transaction.atomic():
+                ids = list(queryset.order_by().values_list(
+                    'pk', flat=True
+                )[:batch_size])
+                if not ids:
+                    break
+                processed = action(queryset.model.objects.filter(pk__in=ids))
+                DeletionJob.objects.filter(pk=job.pk).update(
+                    stage=stage, processed=F('processed') + processed
+                )
+    if job.kind == DeletionJob.GROUP:
+        feed_cache.bump(feed_cache.INDEX_SCOPE)
+    DeletionJob.objects.filter(pk=job.pk).update(finished=timezone.now())
+
+
+def run_pending(batch_size=BATCH_SIZE) -> list:
+    """Доводит до конца незавершённые задачи, например после перезапуска."""
+    jobs = list(DeletionJob.objects.using(
+        router.db_for_write(DeletionJob)
+    ).filter(finished=None).order_by('pk'))
+    for job in jobs:
+        run_job(job.pk, batch_size)
+    return jobs
+
+
+def schedule(kind, obj, label) -> DeletionJob:
+    job, _ = DeletionJob.objects.get_or_create(
+        kind=kind, object_id=obj.pk, finished=None,
+        defaults={'label': label}
+    )
+    submit(run_job, job.pk)
+    return job
+
+
+def schedule_user_deletion(user) -> DeletionJob:
+    """Сразу отключает пользователя, данные удаляются в фоне."""
+    User.objects.filter(pk=user.pk).update(is_active=False)
+    return schedule(DeletionJob.USER, user, user.username)
+
+
+def schedule_group_deletion(group) -> DeletionJob:
+    return schedule(DeletionJob.GROUP, group, group.slug)
@@ -0,0 +1,149 @@
+import csv
+import json
+import time
+import zipfile
+
+from django.core.exceptions import SuspiciousFileOperation
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+EXPORT_CHUNK_SIZE = 2000
+FILE_CHUNK_SIZE = 64 * 1024
+POST_FIELDS = ('type', 'ref', 'author', 'group', 'text', 'pub_date', 'image')
+COMMENT_FIELDS = ('type', 'post', 'author', 'text', 'pub_date')
+
+
+def post_records(group=None, author=None) -> object:
+    """
+    Посты в формате import_content, включая архивные.
+
+    values() и iterator() читают строки порциями с курсора, не создавая
+    моделей и не накапливая результат в queryset.
+    """
+    for model in (ArchivedPost, Post):
+        posts = model.objects.order_by('pk')
+        if group is not None:
+            posts = posts.filter(group=group)
+        if author is not None:
+            posts = posts.filter(author=author)
+        for pk, username, slug, text, pub_date, image in posts.values_list(
+            'pk', 'author__username', 'group__slug', 'text', 'pub_date',
+            'image'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield {
+                'type': 'post',
+                'ref': str(pk),
+                'author': username,
+                'group': slug or '',
+                'text': text,
+                'pub_date': pub_date.isoformat(),
+                'image': image,
+            }
+
+
+def comment_records(author) -> object:
+    """Комментарии пользователя в формате import_content."""
+    for model in (ArchivedComment, Comment):
+        for post_id, text, pub_date in model.objects.filter(
+            author=author
+        ).order_by('pk').values_list(
+            'post_id', 'text', 'pub_date'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield {
+                'type': 'comment',
+                'post': str(post_id),
+                'author': author.username,
+                'text': text,
+                'pub_date': pub_date.isoformat(),
+            }
+
+
+def jsonl_lines(records, fields=()) -> object:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class LineBuffer:
+    """Приёмник для csv.writer: отдаёт записанную строку как есть."""
+
+    def write(self, value) -> str:
+        return value
+
+
+def csv_lines(records, fields) -> object:
+    writer = csv.DictWriter(LineBuffer(), fieldnames=fields)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+SERIALIZERS = {
+    'jsonl': (jsonl_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
+
+
+class ZipBuffer:
+    """
+    Файл без seek() для zipfile: накопленное забирается drain().
+
+    zipfile пишет в такие потоки локальные заголовки с дескрипторами
+    данных, поэтому архив можно отдавать по мере создания.
+    """
+
+    def __init__(self) -> None:
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> object:
+        """Записанные с прошлого вызова байты (пустой список, если их нет)."""
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def user_archive(user) -> object:
+    """
+    Архив пользователя: посты, комментарии и изображения постов.
+
+    Части zip отдаются сразу после записи, в памяти — не больше одного
+    блока текста или файла.
+    """
+    buffer = ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, records in (
+            ('posts.jsonl', post_records(author=user)),
+            ('comments.jsonl', comment_records(user)),
+        ):
+            with archive.open(name, 'w') as member:
+                for line in jsonl_lines(records):
+                    member.write(line.encode())
+                    yield from buffer.drain()
+        storage = Post.image.field.storage
+        images = Post.objects.filter(author=user).exclude(
+            image=''
+        ).order_by().values_list('image', flat=True).union(
+            ArchivedPost.objects.filter(author=user).exclude(
+                image=''
+            ).order_by().values_list('image', flat=True)
+        ).order_by('image')
+        for image in images.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            try:
+                source = storage.open(image, 'rb')
+            except (OSError, SuspiciousFileOperation):
+                continue
+            info = zipfile.ZipInfo(
+                f'images/{image}', date_time=time.localtime()[:6]
+            )
+            # Изображения уже сжаты, повторное сжатие только тратит CPU.
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w') as member:
+                for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                    member.write(chunk)
+                    yield from buffer.drain()
+    yield from buffer.drain()
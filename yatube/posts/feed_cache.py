@@ -0,0 +1,160 @@
+from hashlib import md5
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ArchivedPost, Group, Post, User
+from .settings import FEED_CACHE_TIMEOUT
+
+GENERATION_KEY = 'feed-generation:{}'
+COUNT_KEY = 'feed-count:{}:{}'
+NAME_KEY = 'feed-name:{}:{}'
+POST_AUTHOR_KEY = 'feed-post-author:{}'
+BUMPED_KEY = 'feed-bumped:{}'
+INDEX_SCOPE = 'index'
+
+
+def _digest(name) -> str:
+    """
+    Слаг или username для ключа кеша: memcached не примет пробелы
+    и слишком длинные ключи.
+    """
+    return md5(str(name).encode()).hexdigest()
+
+
+def group_scope(slug) -> str:
+    return f'group:{_digest(slug)}'
+
+
+def author_scope(username) -> str:
+    return f'author:{_digest(username)}'
+
+
+def post_scope(post_id) -> str:
+    return f'post:{post_id}'
+
+
+def _name(model, field, pk) -> str:
+    """
+    Имя объекта (username, slug) по id для области кеша.
+
+    Читается из кеша: сигналы каскадного удаления получают области
+    без запроса к базе на каждую удаляемую строку.
+    """
+    key = NAME_KEY.format(model._meta.label_lower, pk)
+    name = cache.get(key)
+    if name is None:
+        name = model.objects.filter(pk=pk).values_list(
+            field, flat=True
+        ).first()
+        cache.set(key, name, None)
+    return name
+
+
+def forget_name(model, pk) -> None:
+    cache.delete(NAME_KEY.format(model._meta.label_lower, pk))
+
+
+def author_scope_by_id(author_id) -> str:
+    return author_scope(_name(User, 'username', author_id))
+
+
+def group_scope_by_id(group_id) -> str:
+    return group_scope(_name(Group, 'slug', group_id))
+
+
+def post_author_scopes(post_id) -> list:
+    """
+    Область автора поста, если пост есть: его страница выводит счётчики
+    автора.
+
+    Автор поста не меняется, поэтому id читается из кеша; отсутствующий
+    пост не кешируется, чтобы не спрятать область поста, созданного позже.
+    """
+    key = POST_AUTHOR_KEY.format(post_id)
+    author_id = cache.get(key)
+    if author_id is None:
+        author_id = next((
+            author_id for model in (Post, ArchivedPost)
+            for author_id in model.objects.filter(
+                pk=post_id
+            ).values_list('author_id', flat=True)
+        ), None)
+        if author_id is None:
+            return []
+        cache.set(key, author_id, None)
+    return [author_scope_by_id(author_id)]
+
+
+def _initial_generation() -> int:
+    # После вытеснения ключа поколение не должно совпасть с прежним.
+    return int(time() * 1000)
+
+
+def generations(*scopes) -> list:
+    """Текущие поколения нескольких областей за одно обращение к кешу."""
+    keys = [GENERATION_KEY.format(scope) for scope in scopes]
+    stored = cache.get_many(keys)
+    return [
+        stored[key] if key in stored else generation(scope)
+        for scope, key in zip(scopes, keys)
+    ]
+
+
+def generation(scope) -> int:
+    """Текущее поколение кеша ленты."""
+    key = GENERATION_KEY.format(scope)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, _initial_generation(), None)
+        value = cache.get(key)
+    return value
+
+
+def bump(*scopes) -> None:
+    """Делает устаревшими все закешированные фрагменты лент."""
+    for scope in scopes:
+        key = GENERATION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_generation(), None)
+    if settings.DATABASE_REPLICAS and scopes:
+        cache.set_many(
+            {BUMPED_KEY.format(scope): True for scope in scopes},
+            settings.REPLICA_STICKINESS_SECONDS
+        )
+
+
+def recently_bumped(*scopes) -> bool:
+    """
+    Сменилось ли поколение какой-то из областей за последние
+    REPLICA_STICKINESS_SECONDS.
+
+    Пока реплики догоняют запись, страницы этих областей читаются с
+    основной базы, иначе кеш нового поколения заполнился бы старыми
+    данными с реплики.
+    """
+    if not settings.DATABASE_REPLICAS:
+        return False
+    return bool(cache.get_many(
+        [BUMPED_KEY.format(scope) for scope in scopes]
+    ))
+
+
+def feed_cache_context(scope) -> dict:
+    """Переменные шаблона для тега {% cache %} ленты."""
+    return {
+        'feed_cache_timeout': FEED_CACHE_TIMEOUT,
+        'feed_generation': generation(scope),
+    }
+
+
+def cached_count(scope, queryset) -> int:
+    """Число записей ленты, закешированное до смены её поколения."""
+    return cache.get_or_set(
+        COUNT_KEY.format(scope, generation(scope)),
+        queryset.count,
+        FEED_CACHE_TIMEOUT
+    )
@@ -0,0 +1,278 @@
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, feed_cache, search, timeline
+from .forms import CommentForm, PostForm
+from .models import (
+    Comment, Follow, Group, ImportCheckpoint, ImportedPost, Post, User
+)
+
+BATCH_SIZE = 1000
+# Сколько ошибок хранится с текстом; остальные только считаются.
+MAX_ERRORS = 20
+
+
+class RecordError(Exception):
+    """Запись источника не прошла проверку и пропущена."""
+
+
+def read_jsonl(file) -> object:
+    for line in file:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        # Запись без типа попадёт в ошибки и не остановит импорт.
+        yield record if isinstance(record, dict) else {}
+
+
+def read_csv(file) -> object:
+    yield from csv.DictReader(file)
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def insert_as_is(objs) -> None:
+    """
+    Вставляет объекты одной модели порциями, не вызывая pre_save полей.
+
+    bulk_create перезаписал бы дату публикации из источника через
+    auto_now_add. Вставка в режиме raw, как при загрузке фикстур, берёт
+    значения атрибутов как есть и не трогает настройки полей, общие для
+    всех потоков процесса.
+    """
+    if not objs:
+        return
+    model = type(objs[0])
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not (field.primary_key and objs[0].pk is None)
+    ]
+    batch_size = max(connection.ops.bulk_batch_size(fields, objs), 1)
+    for start in range(0, len(objs), batch_size):
+        model.objects._insert(
+            objs[start:start + batch_size], fields=fields, raw=True
+        )
+
+
+def insert_returning_id(obj) -> int:
+    """Вставляет объект, как insert_as_is, и возвращает id от базы."""
+    return type(obj).objects._insert([obj], fields=[
+        field for field in obj._meta.concrete_fields if not field.primary_key
+    ], return_id=True, raw=True)
+
+
+class Importer:
+    """
+    Потоковый импорт постов, комментариев и подписок.
+
+    Записи читаются по одной и пишутся порциями (insert_as_is), каждая
+    порция — в своей транзакции вместе с контрольной точкой, поэтому
+    прерванный импорт продолжается с первой незафиксированной порции.
+    Текст проверяется полями PostForm и CommentForm, авторы и группы
+    ищутся в словарях, загруженных один раз. Вставка порциями не
+    отправляет сигналы моделей: в той же транзакции порция сама
+    обновляет ленты подписок, счётчики и поисковый индекс затронутых
+    записей, а после фиксации — поколения кеша.
+    """
+
+    def __init__(self, source, batch_size=BATCH_SIZE) -> None:
+        self.source = source
+        self.batch_size = batch_size
+        self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.load_posts()
+        self.text_fields = {
+            'post': PostForm.base_fields['text'],
+            'comment': CommentForm.base_fields['text'],
+        }
+        self.imported = {'post': 0, 'comment': 0, 'follow': 0}
+        self.errors = []
+        self.error_count = 0
+
+    def load_posts(self) -> None:
+        """
+        Соответствия ref → id поста источника и id тех из них, что ещё в
+        рабочей таблице: комментарии пишутся только к ним.
+        """
+        imported = ImportedPost.objects.filter(source=self.source)
+        self.posts = dict(imported.values_list('ref', 'post_id'))
+        self.live_posts = set(Post.objects.filter(
+            pk__in=imported.values('post_id')
+        ).values_list('pk', flat=True))
+
+    def checkpoint(self) -> int:
+        return ImportCheckpoint.objects.filter(
+            source=self.source
+        ).values_list('records', flat=True).first() or 0
+
+    def reset(self) -> None:
+        ImportCheckpoint.objects.filter(source=self.source).delete()
+
+    def user_id(self, username) -> int:
+        try:
+            return self.users[username]
+        except (KeyError, TypeError):
+            raise RecordError(f'нет пользователя {username!r}')
+
+    def text(self, kind, value) -> str:
+        try:
+            return self.text_fields[kind].clean(value)
+        except ValidationError as error:
+            raise RecordError('; '.join(error.messages))
+
+    def pub_date(self, value) -> object:
+        if not value:
+            return timezone.now()
+        try:
+            parsed = parse_datetime(value)
+        except (TypeError, ValueError):
+            # Формат верный, но даты нет (месяц 13) или значение не строка.
+            parsed = None
+        if parsed is None:
+            raise RecordError(f'неверная дата {value!r}')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def post(self, record) -> tuple:
+        ref = str(record.get('ref') or '')
+        if not ref:
+            raise RecordError('у поста нет ref')
+        if ref in self.posts:
+            raise RecordError(f'пост {ref!r} уже импортирован')
+        group = str(record.get('group') or '') or None
+        if group and group not in self.groups:
+            raise RecordError(f'нет группы {group!r}')
+        return Post(
+            text=self.text('post', record.get('text')),
+            author_id=self.user_id(record.get('author')),
+            group_id=self.groups.get(group),
+            pub_date=self.pub_date(record.get('pub_date')),
+        ), ref
+
+    def comment(self, record) -> Comment:
+        post_id = self.posts.get(str(record.get('post') or ''))
+        if post_id is None:
+            raise RecordError(f"нет поста {record.get('post')!r}")
+        if post_id not in self.live_posts:
+            raise RecordError(
+                f"пост {record.get('post')!r} в архиве или удалён"
+            )
+        return Comment(
+            post_id=post_id,
+            author_id=self.user_id(record.get('author')),
+            text=self.text('comment', record.get('text')),
+            pub_date=self.pub_date(record.get('pub_date')),
+        )
+
+    def follow(self, record) -> Follow:
+        user_id = self.user_id(record.get('user'))
+        author_id = self.user_id(record.get('author'))
+        if user_id == author_id:
+            raise RecordError('подписка на самого себя')
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def write_batch(self, batch, position) -> None:
+        posts, comments, follows = [], [], []
+        with transaction.atomic():
+            refs = []
+            for number, record in batch:
+                try:
+                    kind = record.get('type')
+                    if kind == 'post':
+                        post, ref = self.post(record)
+                        # id выдаёт база: MAX(id) + 1 совпал бы у
+                        # параллельных импортов и обычных постов.
+                        post.pk = insert_returning_id(post)
+                        # Комментарии этой же порции уже видят пост.
+                        self.posts[ref] = post.pk
+                        self.live_posts.add(post.pk)
+                        posts.append(post)
+                        refs.append(ImportedPost(
+                            source=self.source, ref=ref, post_id=post.pk
+                        ))
+                    elif kind == 'comment':
+                        comments.append(self.comment(record))
+                    elif kind == 'follow':
+                        follows.append(self.follow(record))
+                    else:
+                        raise RecordError(f'неизвестный тип {kind!r}')
+                except RecordError as error:
+                    self.error(number, error)
+            counters.count_created_posts(posts)
+            insert_as_is(comments)
+            ImportedPost.objects.bulk_create(refs)
+            Follow.objects.bulk_create(follows, ignore_conflicts=True)
+            self.apply_side_effects(posts, comments, follows)
+            ImportCheckpoint.objects.update_or_create(
+                source=self.source, defaults={'records': position}
+            )
+        self.imported['post'] += len(posts)
+        self.imported['comment'] += len(comments)
+        self.imported['follow'] += len(follows)
+        self.bump_caches(posts, comments, follows)
+
+    def error(self, number, error) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((number, str(error)))
+
+    def apply_side_effects(self, posts, comments, follows) -> None:
+        """
+        То, что при обычном сохранении делают сигналы, для одной порции.
+
+        Счётчики постов учтены при вставке; пересчитываются только авторы
+        комментариев и участники подписок, а также прокомментированные
+        посты.
+        """
+        counters.recount_authors({
+            *(comment.author_id for comment in comments),
+            *(follow.user_id for follow in follows),
+            *(follow.author_id for follow in follows),
+        })
+        counters.recount_posts({comment.post_id for comment in comments})
+        timeline.fan_out_posts(posts)
+        for follow in follows:
+            timeline.backfill(follow.user_id, follow.author_id)
+        search.index_posts(post.pk for post in posts)
+
+    def bump_caches(self, posts, comments, follows) -> None:
+        if not (posts or comments or follows):
+            return
+        author_ids = {post.author_id for post in posts}
+        author_ids.update(follow.author_id for follow in follows)
+        feed_cache.bump(
+            feed_cache.INDEX_SCOPE,
+            *map(feed_cache.author_scope_by_id, author_ids),
+            *map(feed_cache.group_scope_by_id, {
+                post.group_id for post in posts if post.group_id
+            }),
+            *map(feed_cache.post_scope, {
+                comment.post_id for comment in comments
+            }),
+        )
+
+    def run(self, records) -> None:
+        """Импортирует записи, пропуская уже зафиксированные."""
+        start = self.checkpoint()
+        numbered = enumerate(islice(records, start, None), start=start + 1)
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                return
+            try:
+                self.write_batch(batch, batch[-1][0])
+            except Exception:
+                # Порция откатилась: ссылки на её посты недействительны.
+                self.load_posts()
+                raise
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_posts, BATCH_SIZE, horizon
+from posts.settings import ARCHIVE_AFTER_DAYS
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит старые посты с комментариями в архивные таблицы. '
+        'Архивные посты по-прежнему открываются по ссылке, в профиле '
+        'и в поиске'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше стольких дней'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Постов в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        moved = archive_posts(
+            horizon(options['days']), batch_size=options['batch_size']
+        )
+        self.stdout.write(f'Перенесено в архив постов: {moved}')
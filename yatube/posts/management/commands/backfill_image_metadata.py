@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.uploads import backfill_metadata
+
+
+class Command(BaseCommand):
+    help = 'Заполняет размеры, формат и размер файла изображений постов'
+
+    def handle(self, *args, **options):
+        filled, failed = backfill_metadata()
+        self.stdout.write(
+            f'Заполнено: {filled}, не удалось прочитать: {failed}'
+        )
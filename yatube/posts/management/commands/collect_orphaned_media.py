@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from posts.media_gc import MediaCollector
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет изображения, на которые не ссылается ни один пост, '
+        'и миниатюры без записи в kvstore'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено'
+        )
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='Не больше стольких удалений в секунду (0 — без ограничения)'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=24 * 60 * 60,
+            help='Не трогать файлы моложе стольких секунд'
+        )
+
+    def handle(self, *args, **options):
+        stats = MediaCollector(
+            dry_run=options['dry_run'],
+            rate=options['rate'],
+            min_age=options['min_age'],
+        ).collect()
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f"{verb}: изображений {stats['images']}, "
+            f"миниатюр {stats['thumbnails']}, "
+            f"{stats['bytes'] / (1024 * 1024):.1f} МБ"
+        )
@@ -0,0 +1,61 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporter import POST_FIELDS, post_records, SERIALIZERS, user_archive
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты в JSONL или CSV в формате import_content '
+        'или архив пользователя в zip'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=sorted(SERIALIZERS), default='jsonl',
+            help='Формат выгрузки постов'
+        )
+        parser.add_argument('--group', help='Только посты группы (slug)')
+        parser.add_argument('--author', help='Только посты автора')
+        parser.add_argument(
+            '--archive', metavar='USERNAME',
+            help='Выгрузить zip-архив пользователя вместо постов'
+        )
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию — stdout'
+        )
+
+    def lookup(self, model, **lookup) -> object:
+        try:
+            return model.objects.get(**lookup)
+        except model.DoesNotExist:
+            raise CommandError(f'Не найдено: {lookup}')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if options['archive']:
+            if not output:
+                raise CommandError('Для архива нужен --output')
+            user = self.lookup(User, username=options['archive'])
+            with open(output, 'wb') as file:
+                for chunk in user_archive(user):
+                    file.write(chunk)
+            return
+        group = author = None
+        if options['group']:
+            group = self.lookup(Group, slug=options['group'])
+        if options['author']:
+            author = self.lookup(User, username=options['author'])
+        serialize = SERIALIZERS[options['format']][0]
+        file = (
+            open(output, 'w', encoding='utf-8', newline='')
+            if output else sys.stdout
+        )
+        try:
+            for line in serialize(post_records(group, author), POST_FIELDS):
+                file.write(line)
+        finally:
+            if output:
+                file.close()
@@ -0,0 +1,54 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importer import BATCH_SIZE, Importer, READERS
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты, комментарии и подписки из JSONL или CSV. '
+        'Прерванный импорт продолжается с последней контрольной точки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с записями')
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Формат файла; по умолчанию — по расширению'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Записей в одной транзакции'
+        )
+        parser.add_argument(
+            '--source',
+            help='Имя источника для контрольных точек; по умолчанию — путь'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с начала файла, забыв контрольную точку'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1][1:]
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат: {file_format!r}')
+        importer = Importer(
+            options['source'] or os.path.abspath(path),
+            batch_size=options['batch_size']
+        )
+        if options['restart']:
+            importer.reset()
+        with open(path, encoding='utf-8', newline='') as file:
+            importer.run(READERS[file_format](file))
+        for number, error in importer.errors:
+            self.stderr.write(f'Запись {number}: {error}')
+        imported = importer.imported
+        self.stdout.write(
+            f"Импортировано: постов {imported['post']}, "
+            f"комментариев {imported['comment']}, "
+            f"подписок {imported['follow']}; "
+            f'пропущено с ошибками: {importer.error_count}'
+        )
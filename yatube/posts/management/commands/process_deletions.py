@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts.deletion import BATCH_SIZE, run_pending
+from posts.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Доводит до конца отложенные удаления пользователей и групп, '
+        'например прерванные перезапуском процесса'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Строк в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        for job in run_pending(options['batch_size']):
+            job = DeletionJob.objects.get(pk=job.pk)
+            self.stdout.write(
+                f'{job}: обработано строк {job.processed}'
+            )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и исправляет расхождения'
+
+    def handle(self, *args, **options):
+        for name, recount in (
+            ('авторов', counters.recount_authors),
+            ('групп', counters.recount_groups),
+            ('постов', counters.recount_posts),
+        ):
+            self.stdout.write(f'Исправлено счётчиков {name}: {recount()}')
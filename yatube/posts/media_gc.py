@@ -0,0 +1,171 @@
+import os
+import time
+from itertools import islice
+
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from .models import ArchivedPost, Post, StoredFile
+from .thumbnails import forget_stored_images, variant_files
+
+CHUNK_SIZE = 500
+
+
+def walk(storage, directory) -> object:
+    """
+    Файлы каталога хранилища: (имя, путь, время изменения, размер).
+
+    Каталоги обходятся через os.scandir без построения полного списка.
+    """
+    stack = [storage.path(directory)]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    name = os.path.relpath(entry.path, storage.location)
+                    yield (
+                        name.replace(os.sep, '/'), entry.path,
+                        stat.st_mtime, stat.st_size
+                    )
+
+
+def chunks(iterable, size=CHUNK_SIZE) -> object:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Throttle:
+    """Не больше rate удалений в секунду; 0 — без ограничения."""
+
+    def __init__(self, rate) -> None:
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        delay = self.next_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_at = max(self.next_at, time.monotonic()) + self.interval
+
+
+class MediaCollector:
+    """
+    Ищет и удаляет файлы, на которые больше ничего не ссылается.
+
+    Сначала обходятся оригиналы изображений постов: ссылки на них
+    проверяются одним запросом на порцию имён и ещё раз перед самим
+    удалением. Вместе с оригиналом удаляются его миниатюры (с тем же
+    ограничением скорости и учётом в статистике), записи о них в kvstore
+    sorl и в кеше Django. Затем обходятся миниатюры: файл без записи в
+    kvstore — мусор.
+    Файлы моложе min_age секунд не трогаются: их загрузка или
+    создание миниатюры могли ещё не завершиться.
+    """
+
+    def __init__(self, dry_run=False, rate=0, min_age=0) -> None:
+        self.dry_run = dry_run
+        self.throttle = Throttle(rate)
+        self.cutoff = time.time() - min_age
+        self.stats = {'images': 0, 'thumbnails': 0, 'bytes': 0}
+
+    def old_files(self, storage, directory) -> object:
+        return (
+            file for file in walk(storage, directory)
+            if file[2] < self.cutoff
+        )
+
+    def remove(self, path, size, kind) -> None:
+        self.stats[kind] += 1
+        self.stats['bytes'] += size
+        if self.dry_run:
+            return
+        self.throttle.wait()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def collect_images(self) -> None:
+        storage = Post.image.field.storage
+        directory = Post.image.field.upload_to
+        for chunk in chunks(self.old_files(storage, directory)):
+            names = [name for name, *_ in chunk]
+            referenced = {
+                image for model in (Post, ArchivedPost)
+                for image in model.objects.filter(
+                    image__in=names
+                ).values_list('image', flat=True)
+            }
+            for name, path, _, size in chunk:
+                if name not in referenced:
+                    self.collect_image(ImageFile(name, storage), path, size)
+
+    def collect_image(self, image, path, size) -> None:
+        """
+        Удаляет оригинал без ссылок вместе с миниатюрами.
+
+        Ссылки перепроверяются прямо перед удалением. Удаление строки
+        StoredFile первым запросом берёт блокировку записи, и загрузка
+        тех же байтов (ContentAddressedStorage._save) ждёт, пока файл не
+        удалён, а затем запишет его заново.
+        """
+        if self.dry_run:
+            if not self.referenced(image.name):
+                self.remove_image(image, path, size)
+            return
+        with transaction.atomic():
+            StoredFile.objects.filter(name=image.name, refs__lte=0).delete()
+            if self.referenced(image.name):
+                return
+            self.remove_image(image, path, size)
+            default.kvstore.delete(image)
+
+    def referenced(self, name) -> bool:
+        return any(
+            queryset.exists() for queryset in (
+                StoredFile.objects.filter(name=name, refs__gt=0),
+                Post.objects.filter(image=name),
+                ArchivedPost.objects.filter(image=name),
+            )
+        )
+
+    def remove_image(self, image, path, size) -> None:
+        thumbnails = list(variant_files(image).values())
+        for thumbnail in thumbnails:
+            thumbnail_path = thumbnail.storage.path(thumbnail.name)
+            try:
+                thumbnail_size = os.path.getsize(thumbnail_path)
+            except FileNotFoundError:
+                continue
+            self.remove(thumbnail_path, thumbnail_size, 'thumbnails')
+        self.remove(path, size, 'images')
+        if not self.dry_run:
+            forget_stored_images(thumbnails)
+
+    def collect_thumbnails(self) -> None:
+        storage = default.storage
+        for name, path, _, size in self.old_files(
+            storage, thumbnail_settings.THUMBNAIL_PREFIX
+        ):
+            if default.kvstore.get(ImageFile(name, storage)) is None:
+                self.remove(path, size, 'thumbnails')
+
+    def collect(self) -> dict:
+        self.collect_images()
+        self.collect_thumbnails()
+        return self.stats
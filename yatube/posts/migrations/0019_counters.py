@@ -0,0 +1,76 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    AuthorCounters = apps.get_model('posts', 'AuthorCounters')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Group.objects.bulk_update([
+        Group(pk=pk, posts_count=total) for pk, total in
+        Group.objects.annotate(
+            total=models.Count('posts')
+        ).order_by().values_list('pk', 'total').iterator()
+    ], ['posts_count'], batch_size=500)
+    Post.objects.bulk_update([
+        Post(pk=pk, comments_count=total) for pk, total in
+        Post.objects.annotate(
+            total=models.Count('comments')
+        ).order_by().values_list('pk', 'total').iterator()
+    ], ['comments_count'], batch_size=500)
+    counters = {}
+    for field, related_name in (
+        ('posts_count', 'posts'),
+        ('followers_count', 'following'),
+        ('following_count', 'follower'),
+        ('comments_count', 'comments'),
+    ):
+        for pk, total in User.objects.annotate(
+            total=models.Count(related_name)
+        ).order_by().values_list('pk', 'total').iterator():
+            setattr(
+                counters.setdefault(pk, AuthorCounters(author_id=pk)),
+                field,
+                total
+            )
+    AuthorCounters.objects.bulk_create(counters.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_timelineentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorCounters',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Число постов')),
+                ('followers_count', models.IntegerField(default=0, verbose_name='Число подписчиков')),
+                ('following_count', models.IntegerField(default=0, verbose_name='Число подписок')),
+                ('comments_count', models.IntegerField(default=0, verbose_name='Число комментариев')),
+            ],
+            options={
+                'verbose_name': 'Счётчики автора',
+                'verbose_name_plural': 'Счётчики авторов',
+            },
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Число постов'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Число комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
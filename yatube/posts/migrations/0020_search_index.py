@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in (
+        "CREATE VIRTUAL TABLE posts_post_fts USING fts5("
+        "text, tokenize='unicode61 remove_diacritics 2')",
+        "CREATE VIRTUAL TABLE posts_group_fts USING fts5("
+        "title, description, tokenize='unicode61 remove_diacritics 2')",
+        "INSERT INTO posts_post_fts (rowid, text) "
+        "SELECT id, text FROM posts_post",
+        "INSERT INTO posts_group_fts (rowid, title, description) "
+        "SELECT id, title, description FROM posts_group",
+    ):
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE posts_post_fts')
+    schema_editor.execute('DROP TABLE posts_group_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0026_deletion_jobs'),
+    ]
+
+    operations = [
+        # Столбец post_id сохраняется, снимается только внешний ключ.
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.AlterField(
+                    model_name='importedpost',
+                    name='post',
+                    field=models.IntegerField(
+                        db_column='post_id', db_index=True,
+                        verbose_name='Пост'
+                    ),
+                ),
+            ],
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='importedpost',
+                    name='post',
+                ),
+                migrations.AddField(
+                    model_name='importedpost',
+                    name='post_id',
+                    field=models.IntegerField(
+                        db_index=True, verbose_name='Пост'
+                    ),
+                ),
+            ],
+        ),
+    ]
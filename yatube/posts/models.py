@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 from core.models import CreatedModel
 
+from .storage import post_image_storage
+
 User = get_user_model()
 
 
@@ -10,6 +12,9 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Заголовок')
     slug = models.SlugField(unique=True, verbose_name='Идентификатор')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.IntegerField(
+        'Число постов', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -19,6 +24,32 @@ class Group(models.Model):
         return self.title
 
 
+class FeedQuerySet(models.QuerySet):
+
+    def for_feed(self):
+        """Подгружает одним запросом всё, что выводит post_item.html."""
+        return self.select_related('author', 'group').only(
+            'text',
+            'pub_date',
+            'image',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__slug',
+            'group__title',
+        )
+
+
+class PostQuerySet(FeedQuerySet):
+
+    def bulk_create(self, objs, *args, **kwargs) -> list:
+        """bulk_create, сразу обновляющий счётчики авторов и групп."""
+        from .counters import count_created_posts
+        posts = super().bulk_create(objs, *args, **kwargs)
+        count_created_posts(posts)
+        return posts
+
+
 class Post(CreatedModel):
     text = models.TextField(
         verbose_name='Содержание',
@@ -41,14 +72,45 @@ class Post(CreatedModel):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=post_image_storage,
         blank=True,
         verbose_name='Изображение',
         help_text='Прикрепите картинку к посту'
     )
+    image_width = models.PositiveIntegerField(
+        'Ширина изображения', null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота изображения', null=True, editable=False
+    )
+    image_format = models.CharField(
+        'Формат изображения', max_length=10, blank=True, editable=False
+    )
+    image_size = models.PositiveIntegerField(
+        'Размер файла изображения', null=True, editable=False
+    )
+    comments_count = models.IntegerField(
+        'Число комментариев', default=0, editable=False
+    )
+    stored_values = {}
+
+    objects = PostQuerySet.as_manager()
 
     class Meta(CreatedModel.Meta):
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            # По возрастанию: обратный обход индекса даёт порядок ленты
+            # (-pub_date, -pk) целиком, без сортировки по pk.
+            models.Index(
+                fields=['author', 'pub_date'], name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'], name='post_group_date_idx'
+            ),
+            # Главная лента: id входит в индекс SQLite как rowid.
+            models.Index(fields=['pub_date'], name='post_date_idx'),
+        ]
 
     STR_METOD_TEMPLATE = (
         'Пост: {text:.15}... '
@@ -65,6 +127,96 @@ class Post(CreatedModel):
             group=self.group
         )
 
+    @classmethod
+    def from_db(cls, db, field_names, values) -> 'Post':
+        post = super().from_db(db, field_names, values)
+        # Сигналы сравнивают с этими значениями то, что сохраняется.
+        post.stored_values = dict(zip(field_names, values))
+        return post
+
+    def save(self, *args, **kwargs) -> None:
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Счётчик меняется только атомарными UPDATE, форма его не трогает.
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name != 'comments_count'
+                and field.attname not in deferred
+            ]
+        # Ссылка на загруженный файл (ContentAddressedStorage) берётся
+        # в той же транзакции, что и запись поста.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self.stored_values = {
+            field.attname: field.get_prep_value(getattr(self, field.attname))
+            for field in self._meta.concrete_fields
+            if field.attname not in self.get_deferred_fields()
+        }
+
+
+class ArchivedPost(models.Model):
+    """
+    Пост старше горизонта архивации.
+
+    id совпадает с id поста в Post: ссылки на пост и поисковый индекс
+    после переноса остаются прежними.
+    """
+    id = models.IntegerField(primary_key=True)
+    pub_date = models.DateTimeField('Дата публикации')
+    text = models.TextField(verbose_name='Содержание')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        upload_to='posts/',
+        storage=post_image_storage,
+        blank=True,
+        verbose_name='Изображение'
+    )
+    image_width = models.PositiveIntegerField(
+        'Ширина изображения', null=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'Высота изображения', null=True, editable=False
+    )
+    image_format = models.CharField(
+        'Формат изображения', max_length=10, blank=True, editable=False
+    )
+    image_size = models.PositiveIntegerField(
+        'Размер файла изображения', null=True, editable=False
+    )
+    comments_count = models.IntegerField(
+        'Число комментариев', default=0, editable=False
+    )
+
+    objects = FeedQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = [
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='archived_post_author_idx'
+            ),
+        ]
+
+    STR_METOD_TEMPLATE = Post.STR_METOD_TEMPLATE
+    __str__ = Post.__str__
+
 
 class Comment(CreatedModel):
     post = models.ForeignKey(
@@ -87,6 +239,44 @@ class Comment(CreatedModel):
     class Meta(CreatedModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'pub_date'], name='comment_post_date_idx'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий архивного поста; id совпадает с id в Comment."""
+    id = models.IntegerField(primary_key=True)
+    pub_date = models.DateTimeField('Дата публикации')
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'pub_date'],
+                name='archived_comment_post_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
@@ -107,12 +297,147 @@ class Follow(models.Model):
     )
 
     class Meta:
-        models.UniqueConstraint(
-            fields=['author', 'user'], name='unique_follow'
-        )
         verbose_name = 'Подписка на авторов'
         verbose_name_plural = 'Подписки на авторов'
+        constraints = [
+            # Индекс ограничения (user, author) обслуживает и ленту подписок.
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
 
     def __str__(self) -> str:
         return (f'Подписка пользователя {self.user.username} '
                 f'на автора {self.author.username}')
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='timeline_user_date_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_timeline_entry'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'Пост {self.post_id} в ленте {self.user_id}'
+
+
+class AuthorCounters(models.Model):
+    """Денормализованные счётчики пользователя для страницы профиля."""
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Автор'
+    )
+    posts_count = models.IntegerField('Число постов', default=0)
+    followers_count = models.IntegerField('Число подписчиков', default=0)
+    following_count = models.IntegerField('Число подписок', default=0)
+    comments_count = models.IntegerField('Число комментариев', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики автора'
+        verbose_name_plural = 'Счётчики авторов'
+
+    def __str__(self) -> str:
+        return f'Счётчики автора {self.author_id}'
+
+
+class StoredFile(models.Model):
+    """Число постов, ссылающихся на файл в хранилище по хешу содержимого."""
+    name = models.CharField('Имя файла', max_length=255, primary_key=True)
+    refs = models.IntegerField('Число ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл хранилища'
+        verbose_name_plural = 'Файлы хранилища'
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.refs})'
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника уже импортировано (import_content)."""
+    source = models.CharField('Источник', max_length=255, primary_key=True)
+    records = models.IntegerField('Импортировано записей', default=0)
+
+    class Meta:
+        verbose_name = 'Контрольная точка импорта'
+        verbose_name_plural = 'Контрольные точки импорта'
+
+    def __str__(self) -> str:
+        return f'{self.source}: {self.records}'
+
+
+class ImportedPost(models.Model):
+    """
+    Соответствие идентификатора поста в источнике посту на сайте.
+
+    post_id — простой столбец, а не внешний ключ: соответствие остаётся,
+    когда пост уходит в архив или удаляется, и повторный импорт источника
+    не создаёт его заново.
+    """
+    source = models.CharField('Источник', max_length=255)
+    ref = models.CharField('Идентификатор в источнике', max_length=64)
+    post_id = models.IntegerField('Пост', db_index=True)
+
+    class Meta:
+        verbose_name = 'Импортированный пост'
+        verbose_name_plural = 'Импортированные посты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'ref'], name='unique_imported_post'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.source}#{self.ref} → {self.post_id}'
+
+
+class DeletionJob(models.Model):
+    """Отложенное удаление пользователя или группы порциями."""
+    USER = 'user'
+    GROUP = 'group'
+    KINDS = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+    )
+    kind = models.CharField('Что удаляется', max_length=10, choices=KINDS)
+    object_id = models.IntegerField('Идентификатор')
+    label = models.CharField('Название', max_length=255)
+    stage = models.CharField('Этап', max_length=50, blank=True)
+    processed = models.IntegerField('Обработано строк', default=0)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    finished = models.DateTimeField('Завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+    def __str__(self) -> str:
+        return f'{self.get_kind_display()} {self.label}'
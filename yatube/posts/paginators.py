@@ -0,0 +1,175 @@
+import base64
+from datetime import datetime
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+
+from .settings import PAGINATOR_WINDOW
+
+CURSOR_AFTER = 'a'
+CURSOR_BEFORE = 'b'
+
+
+def encode_cursor(direction, obj) -> str:
+    """Упаковывает ключ (pub_date, id) записи в непрозрачный курсор."""
+    raw = f'{direction}{obj.pub_date.isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor) -> tuple:
+    """Распаковывает курсор. Для испорченного курсора возвращает None."""
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode()
+        pub_date, pk = raw[1:].split('|')
+        direction = raw[0]
+        if direction not in (CURSOR_AFTER, CURSOR_BEFORE):
+            return None
+        return direction, datetime.fromisoformat(pub_date), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def page_window(number, num_pages) -> list:
+    """
+    Номера страниц вокруг текущей, первая и последняя.
+
+    Пропуски между ними обозначены None.
+    """
+    window = range(
+        max(1, number - PAGINATOR_WINDOW),
+        min(num_pages, number + PAGINATOR_WINDOW) + 1
+    )
+    pages = []
+    for page_number in sorted({1, num_pages, *window}):
+        if pages and page_number - pages[-1] > 1:
+            pages.append(None)
+        pages.append(page_number)
+    return pages
+
+
+class CursorPage(Page):
+    """Страница ленты, выбранная по курсору без COUNT и OFFSET."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self) -> str:
+        return '<CursorPage>'
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+
+class FeedPaginator(Paginator):
+    """
+    Пагинатор лент постов.
+
+    Поддерживает обычные номера страниц и курсорный режим по ключу
+    (pub_date, id): стоимость любой страницы в курсорном режиме равна
+    стоимости первой. Общее число записей можно передать готовым
+    (из денормализованного счётчика или кеша), чтобы не выполнять COUNT.
+    В date_field можно передать поле с той же датой, по которому есть
+    подходящий индекс, например дату записи материализованной ленты.
+    """
+
+    def __init__(self, object_list, per_page, count=None,
+                 date_field='pub_date', **kwargs):
+        self.date_field = date_field
+        super().__init__(
+            object_list.order_by(f'-{date_field}', '-pk'), per_page, **kwargs
+        )
+        if count is not None:
+            self.count = count
+
+    def page_window(self, number) -> list:
+        return page_window(number, self.num_pages)
+
+    def cursor_page(self, cursor=None) -> CursorPage:
+        """Возвращает страницу после (или перед) записью из курсора."""
+        key = decode_cursor(cursor) if cursor else None
+        if key is None:
+            rows = list(self.object_list[:self.per_page + 1])
+            return CursorPage(
+                rows[:self.per_page], self,
+                has_next=len(rows) > self.per_page, has_previous=False
+            )
+        direction, pub_date, pk = key
+        if direction == CURSOR_AFTER:
+            rows = list(self.object_list.filter(
+                Q(**{f'{self.date_field}__lt': pub_date})
+                | Q(**{self.date_field: pub_date, 'pk__lt': pk})
+            )[:self.per_page + 1])
+            return CursorPage(
+                rows[:self.per_page], self,
+                has_next=len(rows) > self.per_page, has_previous=True
+            )
+        rows = list(self.object_list.filter(
+            Q(**{f'{self.date_field}__gt': pub_date})
+            | Q(**{self.date_field: pub_date, 'pk__gt': pk})
+        ).order_by(self.date_field, 'pk')[:self.per_page + 1])
+        return CursorPage(
+            rows[:self.per_page][::-1], self,
+            has_next=True, has_previous=len(rows) > self.per_page
+        )
+
+
+class ChainedFeed:
+    """
+    Лента из нескольких queryset, идущих друг за другом.
+
+    Части перечисляются от новых постов к старым и не пересекаются по
+    ключу сортировки (рабочая таблица и архив), поэтому срез ленты —
+    это срезы частей подряд. Поддерживает то, что нужно FeedPaginator:
+    order_by(), filter(), count() и срезы.
+    """
+    ordered = True
+
+    def __init__(self, *parts, reverse=False):
+        self.parts = parts
+        self.reverse = reverse
+
+    def order_by(self, *fields) -> 'ChainedFeed':
+        return ChainedFeed(
+            *(part.order_by(*fields) for part in self.parts),
+            reverse=not fields[0].startswith('-')
+        )
+
+    def filter(self, *args, **kwargs) -> 'ChainedFeed':
+        return ChainedFeed(
+            *(part.filter(*args, **kwargs) for part in self.parts),
+            reverse=self.reverse
+        )
+
+    def count(self) -> int:
+        return sum(part.count() for part in self.parts)
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, item) -> list:
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start, stop = item.start or 0, item.stop
+        rows = []
+        for part in reversed(self.parts) if self.reverse else self.parts:
+            if stop is not None and stop <= 0:
+                break
+            chunk = list(part[start:stop])
+            rows.extend(chunk)
+            if stop is not None and len(chunk) == stop - start:
+                break
+            if start and not chunk:
+                # Часть целиком пропущена по смещению.
+                size = part.count()
+            else:
+                size = start + len(chunk)
+            start = max(start - size, 0)
+            stop = stop - size if stop is not None else None
+        return rows
@@ -0,0 +1,182 @@
+import re
+
+from django.db import connection
+
+from .models import ArchivedPost, Group, Post
+from .paginators import ChainedFeed
+
+POST_INDEX = 'posts_post_fts'
+GROUP_INDEX = 'posts_group_fts'
+TOKEN_RE = re.compile(r'\w+')
+CHUNK_SIZE = 500
+
+
+def fts_enabled() -> bool:
+    """Полнотекстовый индекс FTS5 ведётся только в SQLite."""
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(query) -> str:
+    """
+    Превращает пользовательский запрос в выражение FTS5.
+
+    Каждое слово ищется по префиксу, спецсимволы FTS5 отбрасываются.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(query))
+
+
+def _execute(sql, params=()) -> list:
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def index_post(post) -> None:
+    if fts_enabled():
+        unindex_post(post.pk)
+        _execute(
+            f'INSERT INTO {POST_INDEX} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text]
+        )
+
+
+def index_posts(post_ids) -> None:
+    """Индексирует посты post_ids одним запросом на порцию."""
+    if not fts_enabled():
+        return
+    post_ids = list(post_ids)
+    for start in range(0, len(post_ids), CHUNK_SIZE):
+        chunk = post_ids[start:start + CHUNK_SIZE]
+        placeholders = ', '.join(['%s'] * len(chunk))
+        _execute(
+            f'DELETE FROM {POST_INDEX} WHERE rowid IN ({placeholders})', chunk
+        )
+        _execute(
+            f'INSERT INTO {POST_INDEX} (rowid, text) SELECT id, text '
+            f'FROM {Post._meta.db_table} WHERE id IN ({placeholders})',
+            chunk
+        )
+
+
+def unindex_post(post_id) -> None:
+    if fts_enabled():
+        _execute(f'DELETE FROM {POST_INDEX} WHERE rowid = %s', [post_id])
+
+
+def index_group(group) -> None:
+    if fts_enabled():
+        unindex_group(group.pk)
+        _execute(
+            f'INSERT INTO {GROUP_INDEX} (rowid, title, description) '
+            'VALUES (%s, %s, %s)',
+            [group.pk, group.title, group.description]
+        )
+
+
+def unindex_group(group_id) -> None:
+    if fts_enabled():
+        _execute(f'DELETE FROM {GROUP_INDEX} WHERE rowid = %s', [group_id])
+
+
+def rebuild() -> None:
+    """
+    Пересобирает индексы постов и групп по данным таблиц.
+
+    Архивные посты остаются в общем индексе постов: id у них прежние.
+    """
+    if not fts_enabled():
+        return
+    for index, models, columns in (
+        (POST_INDEX, (Post, ArchivedPost), 'text'),
+        (GROUP_INDEX, (Group,), 'title, description'),
+    ):
+        _execute(f'DELETE FROM {index}')
+        for model in models:
+            _execute(
+                f'INSERT INTO {index} (rowid, {columns}) '
+                f'SELECT id, {columns} FROM {model._meta.db_table}'
+            )
+
+
+def filter_posts(queryset, query) -> object:
+    """Оставляет в queryset только посты, подходящие под запрос."""
+    match = match_expression(query)
+    if not match:
+        return queryset.none()
+    if not fts_enabled():
+        return queryset.filter(text__icontains=query)
+    return queryset.extra(
+        where=[
+            f'{Post._meta.db_table}.id IN '
+            f'(SELECT rowid FROM {POST_INDEX} WHERE {POST_INDEX} MATCH %s)'
+        ],
+        params=[match]
+    )
+
+
+def search_groups(query, limit=5) -> list:
+    """Группы, лучше всего подходящие под запрос."""
+    match = match_expression(query)
+    if not match:
+        return []
+    if not fts_enabled():
+        return list(Group.objects.filter(title__icontains=query)[:limit])
+    ids = [row[0] for row in _execute(
+        f'SELECT rowid FROM {GROUP_INDEX} WHERE {GROUP_INDEX} MATCH %s '
+        'ORDER BY rank LIMIT %s',
+        [match, limit]
+    )]
+    groups = Group.objects.in_bulk(ids)
+    return [groups[pk] for pk in ids if pk in groups]
+
+
+class PostSearchResults:
+    """
+    Ранжированная выдача поиска по постам, включая архивные.
+
+    Поддерживает count() и срезы, поэтому её можно передать в Paginator:
+    каждая страница читает из индекса только свои id.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.match = match_expression(query)
+
+    def unranked(self) -> ChainedFeed:
+        """Выдача без FTS5: рабочая таблица, затем архив."""
+        return ChainedFeed(*(
+            filter_posts(model.objects.for_feed(), self.query)
+            for model in (Post, ArchivedPost)
+        ))
+
+    def count(self) -> int:
+        if not self.match:
+            return 0
+        if not fts_enabled():
+            return self.unranked().count()
+        return _execute(
+            f'SELECT COUNT(*) FROM {POST_INDEX} WHERE {POST_INDEX} MATCH %s',
+            [self.match]
+        )[0][0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __getitem__(self, item) -> list:
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        if not self.match:
+            return []
+        if not fts_enabled():
+            return self.unranked()[item]
+        ids = [row[0] for row in _execute(
+            f'SELECT rowid FROM {POST_INDEX} WHERE {POST_INDEX} MATCH %s '
+            'ORDER BY rank LIMIT %s OFFSET %s',
+            [self.match, item.stop - start, start]
+        )]
+        posts = Post.objects.for_feed().in_bulk(ids)
+        archived = [pk for pk in ids if pk not in posts]
+        if archived:
+            posts.update(ArchivedPost.objects.for_feed().in_bulk(archived))
+        return [posts[pk] for pk in ids if pk in posts]
@@ -1 +1,12 @@
 POSTS_PER_PAGE: int = 10
+TIMELINE_LENGTH: int = 1000
+TIMELINE_MAX_FOLLOWING: int = 500
+FEED_CACHE_TIMEOUT: int = 60 * 60
+PAGE_CACHE_TIMEOUT: int = 60 * 5
+PAGINATOR_WINDOW: int = 2
+COMMENTS_PER_PAGE: int = 20
+IMAGE_MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS: int = 50_000_000
+IMAGE_MAX_SIDE: int = 2048
+IMAGE_QUALITY: int = 85
+ARCHIVE_AFTER_DAYS: int = 365
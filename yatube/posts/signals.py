@@ -0,0 +1,192 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, feed_cache, search, thumbnails, timeline, uploads
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post, User
+)
+
+
+@receiver(pre_save, sender=Post)
+def store_image_metadata(sender, instance, **kwargs):
+    image = instance.image
+    if not image:
+        metadata = uploads.EMPTY_METADATA
+    elif image._committed:
+        # Файл уже в хранилище: метаданные посчитаны при загрузке.
+        return
+    else:
+        try:
+            metadata = uploads.image_metadata(image)
+        except OSError:
+            metadata = uploads.EMPTY_METADATA
+    for field, value in metadata.items():
+        setattr(instance, field, value)
+
+
+@receiver(pre_save, sender=Post)
+def note_image_upload(sender, instance, **kwargs):
+    # Загрузка берёт новую ссылку, даже если файл совпал с прежним.
+    instance.image_uploaded = (
+        bool(instance.image) and not instance.image._committed
+    )
+
+
+@receiver(post_save, sender=Post)
+def push_post_to_timelines(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author(instance.author_id, posts_count=1)
+        counters.change_group(instance.group_id, 1)
+    else:
+        previous = instance.stored_values.get('group_id', instance.group_id)
+        if previous != instance.group_id:
+            counters.change_group(previous, -1)
+            counters.change_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, posts_count=-1)
+    counters.change_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    group_ids = {
+        instance.group_id, instance.stored_values.get('group_id')
+    } - {None}
+    feed_cache.bump(
+        feed_cache.INDEX_SCOPE,
+        feed_cache.author_scope_by_id(instance.author_id),
+        feed_cache.post_scope(instance.pk),
+        *map(feed_cache.group_scope_by_id, group_ids)
+    )
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    feed_cache.forget_name(Group, instance.pk)
+    feed_cache.bump(
+        feed_cache.INDEX_SCOPE, feed_cache.group_scope(instance.slug)
+    )
+
+
+@receiver(post_save, sender=User)
+def forget_username(sender, instance, created, update_fields=None,
+                    **kwargs):
+    if created or update_fields == {'last_login'}:
+        # Вход пользователя не меняет того, что видно на страницах.
+        return
+    previous = feed_cache.author_scope_by_id(instance.pk)
+    feed_cache.forget_name(User, instance.pk)
+    feed_cache.bump(previous, feed_cache.author_scope_by_id(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_post_page(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.post_scope(instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_profile_page(sender, instance, **kwargs):
+    feed_cache.bump(feed_cache.author_scope_by_id(instance.author_id))
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author(instance.author_id, comments_count=1)
+        counters.change_post(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, comments_count=-1)
+    counters.change_post(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author(instance.author_id, followers_count=1)
+        counters.change_author(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timeline.prune(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, followers_count=-1)
+    counters.change_author(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def index_saved_group(sender, instance, **kwargs):
+    search.index_group(instance)
+
+
+@receiver(post_delete, sender=Group)
+def unindex_deleted_group(sender, instance, **kwargs):
+    search.unindex_group(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def schedule_thumbnails(sender, instance, **kwargs):
+    # У повторно загруженного файла миниатюры уже есть.
+    thumbnails.cached_picture(instance.image)
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    previous = instance.stored_values.get('image')
+    if previous and (
+        instance.image_uploaded or previous != instance.image.name
+    ):
+        instance.image.storage.delete(previous)
+
+
+@receiver(post_delete, sender=Post)
+def release_deleted_image(sender, instance, **kwargs):
+    if instance.image:
+        instance.image.storage.delete(instance.image.name)
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def release_archived_post(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, posts_count=-1)
+    search.unindex_post(instance.pk)
+    if instance.image:
+        instance.image.storage.delete(instance.image.name)
+
+
+@receiver(post_delete, sender=ArchivedComment)
+def count_deleted_archived_comment(sender, instance, **kwargs):
+    counters.change_author(instance.author_id, comments_count=-1)
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+
+def content_hash(content) -> str:
+    """SHA-256 содержимого файла, читаемого по частям."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in iter(lambda: content.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest) -> str:
+    """posts/photo.jpg -> posts/ab/cd/abcd…ef.jpg"""
+    directory, filename = os.path.split(name)
+    extension = os.path.splitext(filename)[1].lower()
+    shards = [
+        digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH]
+        for i in range(SHARD_DEPTH)
+    ]
+    return os.path.join(directory, *shards, digest + extension)
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файлы называются по хешу содержимого и лежат во вложенных каталогах.
+
+    Одинаковые загрузки занимают место на диске один раз и получают одно
+    имя, поэтому и миниатюры для них создаются один раз. Каждый вызов
+    save() добавляет ссылку на файл, delete() снимает её; с диска файл
+    удаляется, когда ссылок не осталось. Файлы без учёта ссылок (загруженные
+    до появления хранилища) delete() не трогает.
+    """
+
+    def get_available_name(self, name, max_length=None) -> str:
+        # Имя определяется содержимым: одно имя — один и тот же файл.
+        return name
+
+    def _save(self, name, content) -> str:
+        from .models import StoredFile
+
+        name = hashed_name(name, content_hash(content))
+        with transaction.atomic():
+            StoredFile.objects.get_or_create(name=name)
+            StoredFile.objects.filter(name=name).update(refs=F('refs') + 1)
+        if not self.exists(name):
+            # Пишем во временный файл и атомарно переименовываем: при
+            # одновременной загрузке одинаковых файлов победит любой.
+            temporary = super()._save(f'{name}.{uuid.uuid4().hex}', content)
+            os.replace(self.path(temporary), self.path(name))
+        return name
+
+    def delete(self, name) -> None:
+        from .models import StoredFile
+
+        with transaction.atomic():
+            StoredFile.objects.filter(name=name).update(refs=F('refs') - 1)
+            released = StoredFile.objects.filter(
+                name=name, refs__lte=0
+            ).delete()[0]
+        if released:
+            # Удаление с диска — только если транзакция зафиксирована.
+            transaction.on_commit(lambda: self._delete_file(name))
+
+    def _delete_file(self, name) -> None:
+        from .models import StoredFile
+
+        if not StoredFile.objects.filter(name=name).exists():
+            super().delete(name)
+
+
+post_image_storage = ContentAddressedStorage()
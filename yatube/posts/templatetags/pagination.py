@@ -0,0 +1,25 @@
+from django import template
+
+from posts.paginators import (
+    CURSOR_AFTER, CURSOR_BEFORE, encode_cursor, page_window as window
+)
+
+register = template.Library()
+
+
+@register.filter
+def next_cursor(page) -> str:
+    """Курсор страницы, следующей за переданной."""
+    return encode_cursor(CURSOR_AFTER, page[-1]) if page else ''
+
+
+@register.filter
+def previous_cursor(page) -> str:
+    """Курсор страницы, предшествующей переданной."""
+    return encode_cursor(CURSOR_BEFORE, page[0]) if page else ''
+
+
+@register.filter
+def page_window(page) -> list:
+    """Номера страниц для навигации вокруг переданной страницы."""
+    return window(page.number, page.paginator.num_pages)
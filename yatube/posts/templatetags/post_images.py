@@ -0,0 +1,19 @@
+from django import template
+
+from posts.thumbnails import cached_picture, resolve_pictures
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_pictures(posts) -> dict:
+    """Миниатюры всех постов страницы одним обращением к кешу."""
+    return resolve_pictures(post.image for post in posts)
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_picture(image, pictures=None) -> dict:
+    """Адаптивная миниатюра поста или заглушка, пока её нет."""
+    if pictures:
+        return {'picture': pictures.get(image.name)}
+    return {'picture': cached_picture(image)}
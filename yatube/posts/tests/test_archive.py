@@ -0,0 +1,138 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import counters
+from posts.archive import author_feed
+from posts.models import (
+    ArchivedComment, ArchivedPost, AuthorCounters, Comment, Follow, Group,
+    Post, TimelineEntry, User
+)
+from posts.paginators import CURSOR_AFTER, encode_cursor, FeedPaginator
+from posts.settings import POSTS_PER_PAGE
+
+OLD_POSTS = POSTS_PER_PAGE + 2
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        old = timezone.now() - timedelta(days=800)
+        for number in range(OLD_POSTS):
+            post = Post.objects.create(
+                text=f'Старый пост про котов {number}',
+                author=cls.user,
+                group=cls.group,
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=old + timedelta(minutes=number)
+            )
+        cls.old_post = post
+        Comment.objects.create(
+            post=cls.old_post, author=cls.reader, text='Старый комментарий'
+        )
+        cls.new_post = Post.objects.create(
+            text='Свежий пост', author=cls.user, group=cls.group
+        )
+        cls.guest = Client()
+
+    def setUp(self):
+        cache.clear()
+        self.stdout = StringIO()
+        call_command('archive_posts', '--batch-size=5', stdout=self.stdout)
+
+    def test_old_posts_moved(self):
+        """Старые посты с комментариями уходят в архив порциями."""
+        self.assertIn(f'постов: {OLD_POSTS}', self.stdout.getvalue())
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(ArchivedPost.objects.count(), OLD_POSTS)
+        self.assertFalse(Comment.objects.exists())
+        comment = ArchivedComment.objects.get()
+        self.assertEqual(comment.post_id, self.old_post.pk)
+        self.assertFalse(TimelineEntry.objects.filter(
+            post_id=self.old_post.pk
+        ).exists())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(
+            AuthorCounters.objects.get(author=self.user).posts_count,
+            OLD_POSTS + 1
+        )
+        self.assertEqual(counters.recount_authors(), 0)
+
+    def test_archived_post_detail(self):
+        """Архивный пост открывается по прежней ссылке, без формы."""
+        response = self.guest.get(
+            reverse('posts:post_detail', args=[self.old_post.pk])
+        )
+        self.assertTrue(response.context['archived'])
+        self.assertEqual(response.context['post'].text, self.old_post.text)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Старый комментарий']
+        )
+        self.assertEqual(
+            self.guest.get(
+                reverse('posts:post_comments', args=[self.old_post.pk])
+            ).status_code,
+            200
+        )
+
+    def test_profile_continues_into_archive(self):
+        """Профиль показывает архивные посты после свежих."""
+        profile = reverse('posts:profile', args=[self.user.username])
+        first = self.guest.get(profile).context['page_obj']
+        self.assertEqual(first[0].pk, self.new_post.pk)
+        self.assertEqual(first.paginator.num_pages, 2)
+        second = self.guest.get(profile, {'page': 2}).context['page_obj']
+        self.assertEqual(len(second), OLD_POSTS + 1 - POSTS_PER_PAGE)
+        self.assertIsInstance(second[0], ArchivedPost)
+
+    def test_cursor_pages_across_tables(self):
+        """Курсорные страницы проходят обе таблицы без пропусков."""
+        paginator = FeedPaginator(author_feed(self.user), 5)
+        page = paginator.cursor_page()
+        seen = list(page)
+        while page.has_next():
+            page = paginator.cursor_page(
+                encode_cursor(CURSOR_AFTER, seen[-1])
+            )
+            seen.extend(page)
+        self.assertEqual(len(seen), OLD_POSTS + 1)
+        self.assertEqual(
+            [post.pub_date for post in seen],
+            sorted((post.pub_date for post in seen), reverse=True)
+        )
+
+    def test_search_finds_archived_posts(self):
+        """Поиск находит архивные посты по общему индексу."""
+        response = self.guest.get(reverse('posts:search'), {'q': 'котов'})
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, OLD_POSTS
+        )
+        self.assertIsInstance(
+            response.context['page_obj'][0], ArchivedPost
+        )
+
+    def test_archived_post_is_read_only(self):
+        """Архивный пост нельзя редактировать и комментировать."""
+        client = Client()
+        client.force_login(self.user)
+        for url in (
+            reverse('posts:post_edit', args=[self.old_post.pk]),
+            reverse('posts:add_comment', args=[self.old_post.pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 404)
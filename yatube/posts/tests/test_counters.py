@@ -0,0 +1,96 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import AuthorCounters, Comment, Follow, Group, Post, User
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_2 = Group.objects.create(
+            title='Другая группа',
+            slug='another-slug',
+            description='Пустая группа',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.follower, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+
+    def assertCounters(self, user, **expected):
+        counters = AuthorCounters.objects.get(author=user)
+        for name, value in expected.items():
+            with self.subTest(user=user, counter=name):
+                self.assertEqual(getattr(counters, name), value)
+
+    def test_counters_follow_changes(self):
+        """Счётчики обновляются при создании и удалении объектов."""
+        self.assertCounters(self.user, posts_count=1, followers_count=1)
+        self.assertCounters(
+            self.follower, following_count=1, comments_count=1
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 1)
+        post.group = self.group_2
+        post.save()
+        self.assertEqual(Group.objects.get(pk=self.group.pk).posts_count, 0)
+        self.assertEqual(
+            Group.objects.get(pk=self.group_2.pk).posts_count, 1
+        )
+        post.delete()
+        Follow.objects.all().delete()
+        self.assertCounters(self.user, posts_count=0, followers_count=0)
+        self.assertCounters(
+            self.follower, following_count=0, comments_count=0
+        )
+
+    def test_recount_counters_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения."""
+        AuthorCounters.objects.filter(author=self.follower).delete()
+        AuthorCounters.objects.filter(author=self.user).update(
+            posts_count=100
+        )
+        Group.objects.update(posts_count=100)
+        Post.objects.update(comments_count=100)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertCounters(self.user, posts_count=1, followers_count=1)
+        self.assertCounters(
+            self.follower, following_count=1, comments_count=1
+        )
+        self.assertEqual(
+            Group.objects.get(pk=self.group.pk).posts_count, 1
+        )
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 1)
+
+    def test_save_keeps_comments_count(self):
+        """Сохранение поста не читает и не затирает счётчик комментариев."""
+        post = Post.objects.get(pk=self.post.pk)
+        Comment.objects.create(
+            post=self.post, author=self.follower, text='Ещё комментарий'
+        )
+        post.text = 'Новый текст'
+        post.group = self.group_2
+        post.save()
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 2)
+        self.assertEqual(
+            Group.objects.get(pk=self.group_2.pk).posts_count, 1
+        )
+        post.group = None
+        post.save()
+        self.assertEqual(
+            Group.objects.get(pk=self.group_2.pk).posts_count, 0
+        )
@@ -0,0 +1,133 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.deletion import (
+    run_job, schedule_group_deletion, schedule_user_deletion
+)
+from posts.models import (
+    ArchivedPost, AuthorCounters, Comment, DeletionJob, Follow, Group, Post,
+    User
+)
+
+
+class DeferredDeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        Follow.objects.create(user=cls.author, author=cls.reader)
+        for number in range(5):
+            post = Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            Comment.objects.create(
+                post=post, author=cls.reader, text='Комментарий'
+            )
+        cls.reader_post = Post.objects.create(
+            text='Пост читателя', author=cls.reader, group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.reader_post, author=cls.author, text='Ответ'
+        )
+        ArchivedPost.objects.create(
+            id=10_000, text='Архивный пост', author=cls.author,
+            pub_date=cls.reader_post.pub_date, group=cls.group
+        )
+
+    def test_user_deleted_in_batches(self):
+        """Пользователь отключается сразу, данные удаляются порциями."""
+        job = schedule_user_deletion(self.author)
+        self.assertFalse(User.objects.get(pk=self.author.pk).is_active)
+        run_job(job.pk, batch_size=2)
+        job.refresh_from_db()
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(job.stage, 'user')
+        self.assertGreater(job.processed, 10)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        counters = AuthorCounters.objects.get(author=self.reader)
+        self.assertEqual(counters.followers_count, 0)
+        self.assertEqual(counters.following_count, 0)
+        self.assertEqual(counters.comments_count, 0)
+        self.reader_post.refresh_from_db()
+        self.assertEqual(self.reader_post.comments_count, 0)
+
+    def test_post_comments_deleted_before_posts(self):
+        """Порция постов не тянет каскадом чужие комментарии."""
+        batches = []
+
+        def delete_rows(queryset):
+            total, counts = queryset.delete()
+            batches.append(counts)
+            return total
+
+        job = schedule_user_deletion(self.author)
+        with mock.patch('posts.deletion.delete_rows', delete_rows):
+            run_job(job.pk, batch_size=2)
+        post_batches = [
+            counts for counts in batches if counts.get('posts.Post')
+        ]
+        self.assertTrue(post_batches)
+        for counts in post_batches:
+            with self.subTest(counts=counts):
+                self.assertNotIn('posts.Comment', counts)
+
+    def test_group_detached_in_batches(self):
+        """Посты группы отвязываются порциями, затем группа удаляется."""
+        job = schedule_group_deletion(self.group)
+        run_job(job.pk, batch_size=2)
+        self.assertFalse(Group.objects.filter(pk=self.group.pk).exists())
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertFalse(Post.objects.filter(group__isnull=False).exists())
+        self.assertFalse(
+            ArchivedPost.objects.filter(group__isnull=False).exists()
+        )
+
+    def test_admin_defers_deletion(self):
+        """Удаление из админки ставит задачу вместо каскада в запросе."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        self.assertEqual(client.get(url).status_code, 200)
+        client.post(url, {'post': 'yes'})
+        self.assertFalse(User.objects.get(pk=self.author.pk).is_active)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        job = DeletionJob.objects.get()
+        self.assertEqual(
+            (job.kind, job.object_id), (DeletionJob.USER, self.author.pk)
+        )
+        stdout = StringIO()
+        call_command('process_deletions', stdout=stdout)
+        self.assertIn('Пользователь author', stdout.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+
+    def test_admin_checks_cascade_permissions(self):
+        """Без права удалять посты удалить их автора из админки нельзя."""
+        staff = User.objects.create_user(
+            username='staff', password='pass', is_staff=True
+        )
+        staff.user_permissions.set(Permission.objects.filter(
+            codename__in=['view_user', 'change_user', 'delete_user']
+        ))
+        client = Client()
+        client.force_login(staff)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        self.assertContains(client.get(url), 'Пост')
+        self.assertEqual(client.post(url, {'post': 'yes'}).status_code, 403)
+        self.assertTrue(User.objects.get(pk=self.author.pk).is_active)
+        self.assertFalse(DeletionJob.objects.exists())
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=cls.user,
+            group=cls.group,
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            )
+        )
+        Post.objects.create(text='Пост без группы', author=cls.user)
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_export_jsonl(self):
+        """JSONL отдаётся потоком в формате import_content."""
+        response = self.client.get(reverse('posts:export_posts'))
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        records = [
+            json.loads(line) for line in
+            b''.join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]['ref'], str(self.post.pk))
+        self.assertEqual(records[0]['group'], 'test-slug')
+        self.assertEqual(records[1]['text'], 'Пост без группы')
+
+    def test_export_csv_filtered_by_group(self):
+        """CSV с фильтром по группе содержит заголовок и посты группы."""
+        response = self.client.get(
+            reverse('posts:export_posts'),
+            {'format': 'csv', 'group': 'test-slug'}
+        )
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['text'], 'Пост с картинкой')
+
+    def test_unknown_format_rejected(self):
+        response = self.client.get(
+            reverse('posts:export_posts'), {'format': 'xml'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_user_archive(self):
+        """Архив содержит посты, комментарии и файлы изображений."""
+        response = self.client.get(reverse('posts:export_archive'))
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        self.assertIsNone(archive.testzip())
+        posts = archive.read('posts.jsonl').decode().splitlines()
+        self.assertEqual(len(posts), 2)
+        comments = archive.read('comments.jsonl').decode().splitlines()
+        self.assertEqual(json.loads(comments[0])['post'], str(self.post.pk))
+        self.assertEqual(
+            archive.read(f'images/{self.post.image.name}'), SMALL_GIF
+        )
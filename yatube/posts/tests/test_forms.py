@@ -1,13 +1,20 @@
+import hashlib
 import shutil
 import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import override_settings, Client, TestCase
 from django.urls import reverse
+from PIL import Image
 
 from posts.models import Comment, Group, Post, User
+from posts.settings import IMAGE_MAX_SIDE
+from posts.storage import hashed_name
 
 USERNAME = 'Author'
 USERNAME_2 = 'Not-Author'
@@ -23,6 +30,19 @@ SMALL_GIF = (
     b'\x00\x00\x01\x00\x01\x00\x00\x02'
     b'\x02\x4c\x01\x00\x3b'
 )
+SMALL_GIF_NAME = hashed_name(
+    'posts/small.gif', hashlib.sha256(SMALL_GIF).hexdigest()
+)
+
+
+def make_jpeg(size, orientation=None) -> bytes:
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return buffer.getvalue()
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -93,9 +113,7 @@ class PostsFormsTests(TestCase):
         self.assertEqual(
             form_data['group'], post.group.id)
         self.assertEqual(self.user, post.author)
-        self.assertEqual(
-            form_data['image'].name, post.image.name.split('/')[-1]
-        )
+        self.assertEqual(post.image.name, SMALL_GIF_NAME)
 
     def test_edit_post(self):
         """Валидная форма изменяет запись в Post и сохраняет с тем же id."""
@@ -115,9 +133,78 @@ class PostsFormsTests(TestCase):
         self.assertEqual(form_data['text'], post.text)
         self.assertEqual(form_data['group'], post.group.id)
         self.assertEqual(self.post.author, post.author)
+        self.assertEqual(post.image.name, SMALL_GIF_NAME)
+
+    def test_create_post_normalizes_image(self):
+        """Большое фото уменьшается, EXIF убирается, поворот применяется."""
+        Post.objects.all().delete()
+        self.author.post(POST_CREATE, data={
+            'text': 'Фото с телефона',
+            'image': SimpleUploadedFile(
+                name='photo.jpg',
+                content=make_jpeg((3000, 1500), orientation=6),
+                content_type='image/jpeg'
+            )
+        })
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (IMAGE_MAX_SIDE // 2, IMAGE_MAX_SIDE))
+            self.assertFalse(image.getexif())
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (IMAGE_MAX_SIDE // 2, IMAGE_MAX_SIDE, 'JPEG')
+        )
+        self.assertEqual(post.image_size, post.image.size)
+
+    def test_create_post_converts_unsupported_format(self):
+        """Формат, который не показать в браузере, перекодируется в PNG."""
+        Post.objects.all().delete()
+        buffer = BytesIO()
+        Image.new('F', (3000, 20)).save(buffer, 'IM')
+        self.author.post(POST_CREATE, data={
+            'text': 'Снимок в формате IM',
+            'image': SimpleUploadedFile(
+                name='scan.im',
+                content=buffer.getvalue(),
+                content_type='application/octet-stream'
+            )
+        })
+        post = Post.objects.get()
+        self.assertTrue(post.image.name.endswith('.png'))
         self.assertEqual(
-            form_data['image'].name, post.image.name.split('/')[-1]
+            (post.image_width, post.image_height, post.image_format),
+            (IMAGE_MAX_SIDE, 14, 'PNG')
+        )
+
+    def test_backfill_image_metadata(self):
+        """Команда заполняет метаданные изображений старых постов."""
+        Post.objects.update(
+            image_width=None, image_height=None, image_format='',
+            image_size=None
         )
+        call_command('backfill_image_metadata', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(
+            (post.image_width, post.image_height, post.image_format),
+            (1, 1, 'GIF')
+        )
+        self.assertEqual(post.image_size, len(SMALL_GIF))
+
+    def test_create_post_rejects_huge_image(self):
+        """Изображение сверх лимита пикселей не сохраняется."""
+        Post.objects.all().delete()
+        with mock.patch('posts.uploads.IMAGE_MAX_PIXELS', 100):
+            response = self.author.post(POST_CREATE, data={
+                'text': 'Слишком большое фото',
+                'image': SimpleUploadedFile(
+                    name='huge.jpg',
+                    content=make_jpeg((20, 20)),
+                    content_type='image/jpeg'
+                )
+            })
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(response.context['form'].has_error('image'))
 
     def test_create_post_page_show_correct_context(self):
         """Форма добавления поста сформирована с правильным контекстом"""
@@ -0,0 +1,207 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.archive import archive_posts
+from posts.importer import Importer, MAX_ERRORS
+from posts.models import (
+    ArchivedPost, AuthorCounters, Comment, Follow, Group, ImportCheckpoint,
+    Post, TimelineEntry, User
+)
+from posts.search import PostSearchResults
+
+RECORDS = [
+    {'type': 'post', 'ref': 'p1', 'author': 'author', 'group': 'test-slug',
+     'text': 'Импортированный пост', 'pub_date': '2015-05-01T10:00:00'},
+    {'type': 'post', 'ref': 'p2', 'author': 'author', 'text': 'Второй пост'},
+    {'type': 'comment', 'post': 'p1', 'author': 'reader',
+     'text': 'Комментарий'},
+    {'type': 'follow', 'user': 'reader', 'author': 'author'},
+    {'type': 'post', 'ref': 'p3', 'author': 'nobody', 'text': 'Без автора'},
+    {'type': 'post', 'ref': 'p4', 'author': 'author', 'text': ''},
+    {'type': 'comment', 'post': 'missing', 'author': 'reader', 'text': 'x'},
+]
+
+
+class ImportContentTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='Описание'
+        )
+
+    def write(self, lines, suffix='.jsonl') -> str:
+        file = tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, delete=False, encoding='utf-8'
+        )
+        with file:
+            file.write(lines)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def run_import(self, path, *args) -> tuple:
+        stdout, stderr = StringIO(), StringIO()
+        call_command(
+            'import_content', path, '--batch-size=2', *args,
+            stdout=stdout, stderr=stderr
+        )
+        return stdout.getvalue(), stderr.getvalue()
+
+    def assert_imported(self):
+        post = Post.objects.get(text='Импортированный пост')
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.comments_count, 1)
+        self.assertTrue(Comment.objects.filter(post=post).exists())
+        self.assertTrue(Follow.objects.filter(
+            user=self.reader, author=self.author
+        ).exists())
+        counters = AuthorCounters.objects.get(author=self.author)
+        self.assertEqual(
+            (counters.posts_count, counters.followers_count), (2, 1)
+        )
+        self.assertEqual(
+            AuthorCounters.objects.get(author=self.reader).comments_count, 1
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(PostSearchResults('импортированный').count(), 1)
+
+    def test_import_jsonl(self):
+        """Валидные записи импортируются, побочные эффекты пересобраны."""
+        path = self.write('\n'.join(map(json.dumps, RECORDS)))
+        stdout, stderr = self.run_import(path)
+        self.assertIn('постов 2, комментариев 1, подписок 1', stdout)
+        self.assertIn('пропущено с ошибками: 3', stdout)
+        self.assertIn("нет пользователя 'nobody'", stderr)
+        self.assert_imported()
+
+    def test_fields_untouched_during_import(self):
+        """Импорт не отключает auto_now_add для других потоков."""
+        apply_side_effects = Importer.apply_side_effects
+        flags = []
+
+        def record_flags(importer, *args):
+            flags.extend(
+                model._meta.get_field('pub_date').auto_now_add
+                for model in (Post, Comment)
+            )
+            apply_side_effects(importer, *args)
+
+        path = self.write('\n'.join(map(json.dumps, RECORDS)))
+        with mock.patch.object(Importer, 'apply_side_effects', record_flags):
+            self.run_import(path)
+        self.assertTrue(flags)
+        self.assertTrue(all(flags))
+        self.assertEqual(
+            Post.objects.get(text='Импортированный пост').pub_date.year, 2015
+        )
+
+    def test_ids_assigned_by_database(self):
+        """Пост, созданный посреди порции, не занимает id импортируемого."""
+        parse_post = Importer.post
+
+        def post_with_race(importer, record):
+            Post.objects.create(text='Обычный пост', author=self.author)
+            return parse_post(importer, record)
+
+        path = self.write('\n'.join(map(json.dumps, RECORDS[:2])))
+        with mock.patch.object(Importer, 'post', post_with_race):
+            stdout, _ = self.run_import(path)
+        self.assertIn('постов 2', stdout)
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_interrupted_import(self):
+        """Сбой порции откатывает её целиком, повторный запуск доводит."""
+        path = self.write('\n'.join(map(json.dumps, RECORDS)))
+        apply_side_effects = Importer.apply_side_effects
+        calls = []
+
+        def failing(importer, *args):
+            calls.append(args)
+            apply_side_effects(importer, *args)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+
+        with mock.patch.object(Importer, 'apply_side_effects', failing):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path)
+        self.assertEqual(ImportCheckpoint.objects.get().records, 2)
+        self.assertFalse(Comment.objects.exists())
+        self.run_import(path)
+        self.assert_imported()
+
+    def test_malformed_records_skipped(self):
+        """Неверные даты, типы и не-объекты — ошибки записей, не сбой."""
+        path = self.write('\n'.join([
+            json.dumps({'type': 'post', 'ref': 'd1', 'author': 'author',
+                        'text': 'Пост', 'pub_date': '2020-13-45T00:00:00'}),
+            json.dumps({'type': 'post', 'ref': 'd2', 'author': 'author',
+                        'text': 'Пост', 'pub_date': 5}),
+            json.dumps({'type': 'post', 'ref': 'd3', 'author': ['author'],
+                        'group': {}, 'text': 'Пост'}),
+            '[1]',
+            '5',
+            json.dumps({'type': 'post', 'ref': 'd4', 'author': 'author',
+                        'text': 'Верный пост'}),
+        ]))
+        stdout, stderr = self.run_import(path)
+        self.assertIn('постов 1', stdout)
+        self.assertIn('пропущено с ошибками: 5', stdout)
+        self.assertIn("неверная дата '2020-13-45T00:00:00'", stderr)
+
+    def test_errors_bounded(self):
+        """Текст хранится только у первых ошибок, остальные считаются."""
+        path = self.write('\n'.join(
+            json.dumps({'type': 'unknown'}) for _ in range(MAX_ERRORS + 5)
+        ))
+        stdout, stderr = self.run_import(path)
+        self.assertIn(f'пропущено с ошибками: {MAX_ERRORS + 5}', stdout)
+        self.assertEqual(len(stderr.splitlines()), MAX_ERRORS)
+
+    def test_resume_from_checkpoint(self):
+        """Повторный запуск не импортирует зафиксированные записи."""
+        path = self.write('\n'.join(map(json.dumps, RECORDS)))
+        self.run_import(path)
+        stdout, _ = self.run_import(path)
+        self.assertIn('постов 0, комментариев 0, подписок 0', stdout)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            ImportCheckpoint.objects.get().records, len(RECORDS)
+        )
+
+    def test_reimport_after_archiving(self):
+        """Архивные посты не импортируются снова, их id не повторяются."""
+        path = self.write('\n'.join(map(json.dumps, RECORDS[:3])))
+        self.run_import(path)
+        archive_posts(timezone.now() + timedelta(days=1))
+        last_id = max(ArchivedPost.objects.values_list('pk', flat=True))
+        stdout, stderr = self.run_import(path, '--restart')
+        self.assertIn('постов 0, комментариев 0', stdout)
+        self.assertIn("пост 'p1' уже импортирован", stderr)
+        self.assertIn("пост 'p1' в архиве или удалён", stderr)
+        self.run_import(self.write(json.dumps({
+            'type': 'post', 'ref': 'p5', 'author': 'author', 'text': 'Новый'
+        })))
+        self.assertGreater(Post.objects.get(text='Новый').pk, last_id)
+
+    def test_import_csv(self):
+        path = self.write(
+            'type,ref,author,group,text,pub_date,post,user\n'
+            'post,c1,author,,Пост из CSV,,,\n'
+            'comment,,reader,,Ответ,,c1,\n',
+            suffix='.csv'
+        )
+        stdout, _ = self.run_import(path)
+        self.assertIn('постов 1, комментариев 1, подписок 0', stdout)
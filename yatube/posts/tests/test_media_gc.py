@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from sorl.thumbnail import default
+
+from posts.media_gc import MediaCollector
+from posts.models import Post, StoredFile, User
+from posts.thumbnails import cached_picture, generate, stored_images
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+ORPHAN_IMAGE = 'posts/00/00/orphan.gif'
+ORPHAN_THUMBNAIL = 'cache/00/00/orphan.jpg'
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaGarbageCollectorTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.clear()
+        self.post = Post.objects.create(
+            text='Тестовый пост',
+            author=User.objects.create_user(username='test-user'),
+            image=SimpleUploadedFile(
+                name='small.gif', content=SMALL_GIF, content_type='image/gif'
+            )
+        )
+        generate(self.post.image.name)
+        for name in (ORPHAN_IMAGE, ORPHAN_THUMBNAIL):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(SMALL_GIF)
+
+    def drop_reference(self) -> None:
+        # Ссылки пропали в обход сигналов, как при массовом UPDATE.
+        Post.objects.filter(pk=self.post.pk).update(image='')
+        StoredFile.objects.filter(name=self.post.image.name).update(refs=0)
+
+    def collect(self, *args) -> str:
+        stdout = StringIO()
+        call_command(
+            'collect_orphaned_media', '--min-age=0', *args, stdout=stdout
+        )
+        return stdout.getvalue()
+
+    def exists(self, name) -> bool:
+        return os.path.exists(os.path.join(TEMP_MEDIA_ROOT, name))
+
+    def test_orphans_removed(self):
+        """Удаляются только файлы без ссылок."""
+        self.assertIn('изображений 1, миниатюр 1', self.collect())
+        self.assertFalse(self.exists(ORPHAN_IMAGE))
+        self.assertFalse(self.exists(ORPHAN_THUMBNAIL))
+        self.assertTrue(self.exists(self.post.image.name))
+        picture = cached_picture(self.post.image)
+        for thumbnail in picture.variants.values():
+            with self.subTest(thumbnail=thumbnail.name):
+                self.assertTrue(thumbnail.exists())
+
+    def test_unreferenced_image_thumbnails_removed(self):
+        """У оригинала без поста удаляются и миниатюры, и записи kvstore."""
+        picture = cached_picture(self.post.image)
+        name = self.post.image.name
+        self.drop_reference()
+        self.collect()
+        self.assertFalse(self.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+        for thumbnail in picture.variants.values():
+            with self.subTest(thumbnail=thumbnail.name):
+                self.assertFalse(thumbnail.exists())
+                self.assertIsNone(default.kvstore.get(thumbnail))
+        self.assertEqual(stored_images(picture.variants.values()), {})
+
+    def test_stored_file_reference_kept(self):
+        """Файл со ссылкой в StoredFile не удаляется, даже без поста."""
+        name = self.post.image.name
+        Post.objects.filter(pk=self.post.pk).update(image='')
+        self.assertIn('изображений 1,', self.collect())
+        self.assertTrue(self.exists(name))
+
+    def test_dry_run(self):
+        """--dry-run только считает."""
+        self.assertIn('Будет удалено', self.collect('--dry-run'))
+        self.assertTrue(self.exists(ORPHAN_IMAGE))
+        self.assertTrue(self.exists(ORPHAN_THUMBNAIL))
+
+    def test_dry_run_counts_unreferenced_image_thumbnails(self):
+        """--dry-run не трогает миниатюры оригинала, но учитывает их."""
+        picture = cached_picture(self.post.image)
+        self.drop_reference()
+        self.assertIn(
+            f'изображений 2, миниатюр {len(picture.variants) + 1}',
+            self.collect('--dry-run')
+        )
+        for thumbnail in picture.variants.values():
+            with self.subTest(thumbnail=thumbnail.name):
+                self.assertTrue(thumbnail.exists())
+                self.assertIsNotNone(default.kvstore.get(thumbnail))
+
+    def test_reupload_during_collection_kept(self):
+        """Загрузка тех же байтов между проверками спасает файл."""
+        name = self.post.image.name
+        self.drop_reference()
+        collect_image = MediaCollector.collect_image
+
+        def reupload_first(collector, image, *args):
+            if image.name == name:
+                Post.objects.create(
+                    text='Повторная загрузка', author=self.post.author,
+                    image=SimpleUploadedFile(
+                        name='again.gif', content=SMALL_GIF,
+                        content_type='image/gif'
+                    )
+                )
+            collect_image(collector, image, *args)
+
+        with mock.patch.object(
+            MediaCollector, 'collect_image', reupload_first
+        ):
+            self.collect()
+        self.assertTrue(self.exists(name))
+        self.assertEqual(
+            Post.objects.get(text='Повторная загрузка').image.name, name
+        )
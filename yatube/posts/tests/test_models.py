@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from posts.models import Comment, Follow, Group, Post, User
@@ -67,3 +68,10 @@ class PostModelTest(TestCase):
                     self.assertEqual(
                         model._meta.get_field(value).verbose_name, expected
                     )
+
+    def test_follow_unique(self):
+        """Повторная подписка на того же автора невозможна."""
+        author = User.objects.create_user(username='author')
+        Follow.objects.create(user=self.user, author=author)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=self.user, author=author)
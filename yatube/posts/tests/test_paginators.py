@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts import paginators
+from posts.models import Post, User
+from posts.paginators import CURSOR_AFTER, encode_cursor, FeedPaginator
+
+
+class FeedPaginatorTests(TestCase):
+    @mock.patch.object(paginators, 'PAGINATOR_WINDOW', 2)
+    def test_page_window(self):
+        """Навигация выводит окно вокруг страницы, первую и последнюю."""
+        paginator = FeedPaginator(Post.objects.all(), 10, count=1000)
+        cases = [
+            [1, [1, 2, 3, None, 100]],
+            [4, [1, 2, 3, 4, 5, 6, None, 100]],
+            [50, [1, None, 48, 49, 50, 51, 52, None, 100]],
+            [100, [1, None, 98, 99, 100]],
+        ]
+        for number, expected in cases:
+            with self.subTest(number=number):
+                self.assertEqual(paginator.page_window(number), expected)
+
+    def test_count_is_not_queried(self):
+        """Переданное число записей заменяет запрос COUNT."""
+        paginator = FeedPaginator(Post.objects.all(), 10, count=35)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.num_pages, 4)
+
+    def test_index_feed_uses_date_index(self):
+        """Главная лента идёт по индексу pub_date без сортировки."""
+        post = Post.objects.create(
+            text='Пост', author=User.objects.create_user(username='author')
+        )
+        paginator = FeedPaginator(Post.objects.for_feed(), 10)
+        with CaptureQueriesContext(connection) as queries:
+            paginator.cursor_page(encode_cursor(CURSOR_AFTER, post))
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {queries[0]['sql']}")
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('post_date_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,59 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post, User
+from posts.settings import POSTS_PER_PAGE
+
+USERNAME = 'test-user'
+USERNAME_2 = 'follower'
+SLUG = 'test-slug'
+INDEX = reverse('posts:index')
+GROUP_URL = reverse('posts:group_list', args=[SLUG])
+PROFILE = reverse('posts:profile', args=[USERNAME])
+FOLLOW_INDEX = reverse('posts:follow_index')
+
+
+class PostsQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.follower = User.objects.create_user(username=USERNAME_2)
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug=SLUG,
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.follower, author=cls.user)
+        for number in range(POSTS_PER_PAGE + 3):
+            post = Post.objects.create(
+                text=f'Тест_{number}', author=cls.user, group=cls.group
+            )
+            Comment.objects.create(
+                post=post, author=cls.follower, text='Комментарий'
+            )
+        cls.POST_DETAIL = reverse('posts:post_detail', args=[post.id])
+        cls.POST_COMMENTS = reverse('posts:post_comments', args=[post.id])
+        cls.guest = Client()
+        cls.reader = Client()
+        cls.reader.force_login(cls.follower)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_views_query_budget(self):
+        """Число запросов страниц не зависит от числа постов."""
+        cases = [
+            [INDEX, self.guest, 2],
+            [GROUP_URL, self.guest, 2],
+            [PROFILE, self.guest, 2],
+            # Плюс автор поста и его имя для области кеша страницы.
+            [self.POST_DETAIL, self.guest, 4],
+            [self.POST_COMMENTS, self.guest, 2],
+            [FOLLOW_INDEX, self.reader, 5],
+        ]
+        for url, client, budget in cases:
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    client.get(url)
@@ -20,8 +20,12 @@ class PostsRoutesTests(TestCase):
             [f'/posts/{POST_ID}/', 'post_detail', [POST_ID]],
             [f'/posts/{POST_ID}/edit/', 'post_edit', [POST_ID]],
             [f'/posts/{POST_ID}/comment/', 'add_comment', [POST_ID]],
+            [f'/posts/{POST_ID}/comments/', 'post_comments', [POST_ID]],
             ['/create/', 'post_create', []],
             ['/follow/', 'follow_index', []],
+            ['/search/', 'search', []],
+            ['/export/posts/', 'export_posts', []],
+            ['/export/archive/', 'export_archive', []],
         ]
         for url, route, args in urls_names:
             with self.subTest(route=route, url=url):
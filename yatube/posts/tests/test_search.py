@@ -0,0 +1,61 @@
+from django.contrib.admin.sites import site
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+SEARCH = reverse('posts:search')
+
+
+class PostsSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test-user')
+        cls.group = Group.objects.create(
+            title='Любители котов',
+            slug='cats',
+            description='Всё о котах',
+        )
+        cls.post = Post.objects.create(
+            text='Мой кот спит на клавиатуре', author=cls.user
+        )
+        cls.other_post = Post.objects.create(
+            text='Собака гуляет во дворе', author=cls.user
+        )
+        cls.guest = Client()
+
+    def test_search_finds_posts_and_groups(self):
+        """Поиск находит посты и группы по началу слова."""
+        response = self.guest.get(SEARCH, {'q': 'кот'})
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+        self.assertEqual(response.context['groups'], [self.group])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.get(pk=self.other_post.pk)
+        post.text = 'Теперь и здесь кот'
+        post.save()
+        self.assertEqual(
+            len(self.guest.get(SEARCH, {'q': 'кот'}).context['page_obj']), 2
+        )
+        post.delete()
+        self.assertEqual(
+            list(self.guest.get(SEARCH, {'q': 'кот'}).context['page_obj']),
+            [self.post]
+        )
+
+    def test_search_ignores_fts_syntax(self):
+        """Спецсимволы запроса не ломают поиск."""
+        for query in ['', '"*', 'кот AND (']:
+            with self.subTest(query=query):
+                self.assertEqual(
+                    self.guest.get(SEARCH, {'q': query}).status_code, 200
+                )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке использует полнотекстовый индекс."""
+        queryset, _ = site._registry[Post].get_search_results(
+            RequestFactory().get('/'), Post.objects.all(), 'клавиатур'
+        )
+        self.assertEqual(list(queryset), [self.post])
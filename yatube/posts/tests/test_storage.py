@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError
+from django.test import override_settings, TransactionTestCase
+
+from posts.models import Post, StoredFile, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='test-user')
+
+    def create_post(self, filename, content=SMALL_GIF,
+                    text='Тестовый пост') -> Post:
+        return Post.objects.create(
+            text=text,
+            author=self.user,
+            image=SimpleUploadedFile(
+                name=filename, content=content, content_type='image/gif'
+            )
+        )
+
+    def test_duplicate_uploads_share_file(self):
+        """Одинаковые загрузки — один файл в шардированном каталоге."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name,
+            r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
+        )
+        self.assertEqual(StoredFile.objects.get(name=first.image.name).refs, 2)
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется с диска, когда на него не ссылается ни один пост."""
+        first = self.create_post('first.gif')
+        second = self.create_post('second.gif')
+        storage, name = first.image.storage, first.image.name
+        first.delete()
+        self.assertTrue(storage.exists(name))
+        self.assertEqual(StoredFile.objects.get(name=name).refs, 1)
+        second.delete()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(StoredFile.objects.filter(name=name).exists())
+
+    def test_replaced_image_released(self):
+        """При замене картинки ссылка на прежний файл снимается."""
+        post = self.create_post('first.gif')
+        previous = post.image.name
+        post.image = SimpleUploadedFile(
+            name='other.gif',
+            content=SMALL_GIF.replace(b'\x4c', b'\x44'),
+            content_type='image/gif'
+        )
+        post.save()
+        self.assertNotEqual(post.image.name, previous)
+        self.assertFalse(post.image.storage.exists(previous))
+
+    def test_reupload_keeps_single_reference(self):
+        """Повторная загрузка того же файла не добавляет лишнюю ссылку."""
+        post = self.create_post('first.gif')
+        post.image = SimpleUploadedFile(
+            name='again.gif', content=SMALL_GIF, content_type='image/gif'
+        )
+        post.save()
+        self.assertEqual(StoredFile.objects.get(name=post.image.name).refs, 1)
+        self.assertTrue(post.image.storage.exists(post.image.name))
+
+    def test_failed_insert_takes_no_reference(self):
+        """Ссылка не остаётся, если запись поста не удалась."""
+        with self.assertRaises(IntegrityError):
+            self.create_post('first.gif', text=None)
+        self.assertFalse(StoredFile.objects.exists())
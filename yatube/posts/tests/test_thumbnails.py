@@ -0,0 +1,138 @@
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import override_settings, TestCase
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from posts import thumbnails
+from posts.models import Post, User
+from posts.thumbnails import (
+    cached_picture, generate, resolve_pictures, schedule, VARIANT_FORMATS,
+    VARIANT_WIDTHS
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=User.objects.create_user(username='test-user'),
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            )
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        default.kvstore.clear()
+
+    def test_render_does_not_generate_thumbnail(self):
+        """Без готовой миниатюры шаблон получает заглушку."""
+        self.assertIsNone(cached_picture(self.post.image))
+
+    def test_rolled_back_schedule_not_pending(self):
+        """Откат транзакции не оставляет изображение в очереди навсегда."""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            schedule(self.post.image.name)
+            raise RuntimeError('откат')
+        self.assertNotIn(self.post.image.name, thumbnails._pending)
+
+    def test_generated_variants_are_found(self):
+        """Созданные в фоне варианты находятся без Pillow."""
+        generate(self.post.image.name)
+        picture = cached_picture(self.post.image)
+        self.assertEqual(
+            len(picture.variants), len(VARIANT_FORMATS) * len(VARIANT_WIDTHS)
+        )
+        for (image_format, width), thumbnail in picture.variants.items():
+            with self.subTest(image_format=image_format, width=width):
+                self.assertEqual(thumbnail.width, width)
+                self.assertTrue(thumbnail.exists())
+        self.assertEqual(
+            len(picture.jpeg_srcset.split(', ')), len(VARIANT_WIDTHS)
+        )
+
+    def test_picture_markup(self):
+        """В шаблоне — <picture> с srcset и размерами."""
+        generate(self.post.image.name)
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.id])
+        )
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'srcset=')
+        self.assertContains(response, 'width="960" height="339"')
+
+    def test_page_pictures_resolved_from_cache(self):
+        """Готовые миниатюры страницы читаются из кеша без запросов."""
+        generate(self.post.image.name)
+        other = Post.objects.create(
+            text='Второй пост',
+            author=self.post.author,
+            image=SimpleUploadedFile(
+                name='other.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            )
+        )
+        generate(other.image.name)
+        cache.clear()
+        resolve_pictures([self.post.image, other.image])
+        with self.assertNumQueries(0):
+            pictures = resolve_pictures([self.post.image, other.image])
+        self.assertIsNotNone(pictures[self.post.image.name])
+        self.assertIsNotNone(pictures[other.image.name])
+
+    def test_missing_pictures_cached(self):
+        """Промахи кешируются: несозданные миниатюры не ищутся в kvstore."""
+        resolve_pictures([self.post.image])
+        with patch.object(
+            default.kvstore, 'get', wraps=default.kvstore.get
+        ) as kvstore_get:
+            pictures = resolve_pictures([self.post.image])
+        self.assertIsNone(pictures[self.post.image.name])
+        kvstore_get.assert_not_called()
+
+    def test_generated_after_miss_found(self):
+        """Созданные миниатюры видны сразу, несмотря на кешированный промах."""
+        self.assertIsNone(cached_picture(self.post.image))
+        generate(self.post.image.name)
+        self.assertIsNotNone(cached_picture(self.post.image))
+
+    def test_unknown_sorl_version_uses_public_api(self):
+        """С непроверенной версией sorl имя миниатюры даёт get_thumbnail()."""
+        generate(self.post.image.name)
+        expected = cached_picture(self.post.image)
+        cache.clear()
+        with patch.object(
+            thumbnails.PrecomputedThumbnailBackend, 'names_supported', False
+        ):
+            picture = cached_picture(self.post.image)
+        self.assertEqual(
+            [thumbnail.name for thumbnail in picture.variants.values()],
+            [thumbnail.name for thumbnail in expected.variants.values()]
+        )
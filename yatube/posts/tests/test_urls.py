@@ -20,6 +20,9 @@ UNFOLLOW = reverse('posts:profile_unfollow', args=[USERNAME])
 UNFOLLOW_TO_LOGIN_REDIRECT = f'{LOGIN}?next={UNFOLLOW}'
 FOLLOW_INDEX = reverse('posts:follow_index')
 FOLLOW_INDEX_TO_LOGIN_REDIRECT = f'{LOGIN}?next={FOLLOW_INDEX}'
+SEARCH = reverse('posts:search')
+EXPORT_POSTS = reverse('posts:export_posts')
+EXPORT_POSTS_TO_LOGIN_REDIRECT = f'{LOGIN}?next={EXPORT_POSTS}'
 
 
 class PostsURLTests(TestCase):
@@ -38,6 +41,9 @@ class PostsURLTests(TestCase):
 
         cls.POST_EDIT = reverse('posts:post_edit', args=[cls.post.id])
         cls.POST_DETAIL = reverse('posts:post_detail', args=[cls.post.id])
+        cls.POST_COMMENTS = reverse(
+            'posts:post_comments', args=[cls.post.id]
+        )
         cls.POST_EDIT_TO_LOGIN_REDIRECT = f'{LOGIN}?next={cls.POST_EDIT}'
 
     def test_urls_exists_and_have_correct_access_rights(self):
@@ -46,6 +52,7 @@ class PostsURLTests(TestCase):
             [GROUP_URL, self.guest, OK],
             [PROFILE, self.guest, OK],
             [self.POST_DETAIL, self.guest, OK],
+            [self.POST_COMMENTS, self.guest, OK],
             [self.POST_EDIT, self.guest, FOUND],
             [self.POST_EDIT, self.another, FOUND],
             [self.POST_EDIT, self.author, OK],
@@ -59,6 +66,9 @@ class PostsURLTests(TestCase):
             [UNFOLLOW, self.another, FOUND],
             [FOLLOW_INDEX, self.guest, FOUND],
             [FOLLOW_INDEX, self.another, OK],
+            [SEARCH, self.guest, OK],
+            [EXPORT_POSTS, self.guest, FOUND],
+            [EXPORT_POSTS, self.author, OK],
         ]
         for url, client, status in cases:
             with self.subTest(url=url, status=status):
@@ -78,6 +88,7 @@ class PostsURLTests(TestCase):
             [UNFOLLOW, self.guest, UNFOLLOW_TO_LOGIN_REDIRECT],
             [UNFOLLOW, self.another, FOLLOW_INDEX],
             [FOLLOW_INDEX, self.guest, FOLLOW_INDEX_TO_LOGIN_REDIRECT],
+            [EXPORT_POSTS, self.guest, EXPORT_POSTS_TO_LOGIN_REDIRECT],
         ]
         for url, client, redirect_url in urls_to_redirect_urls:
             with self.subTest(url=url, redirect_url=redirect_url):
@@ -91,9 +102,11 @@ class PostsURLTests(TestCase):
             GROUP_URL: 'posts/group_list.html',
             PROFILE: 'posts/profile.html',
             self.POST_DETAIL: 'posts/post_detail.html',
+            self.POST_COMMENTS: 'posts/includes/comments.html',
             self.POST_EDIT: 'posts/create_post.html',
             POST_CREATE: 'posts/create_post.html',
-            FOLLOW_INDEX: 'posts/follow.html'
+            FOLLOW_INDEX: 'posts/follow.html',
+            SEARCH: 'posts/search.html',
         }
         for url, template in url_templates_names.items():
             with self.subTest(url=url):
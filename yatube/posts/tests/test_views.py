@@ -1,14 +1,22 @@
+from http.client import NOT_MODIFIED, OK
 import shutil
 import tempfile
+from unittest import mock
+import warnings
 
 from django.conf import settings
 from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import override_settings, Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from posts.models import Comment, Follow, Group, Post, User
-from posts.settings import POSTS_PER_PAGE
+from posts import timeline
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
+from posts.templatetags.pagination import next_cursor, previous_cursor
 
 USERNAME = 'test-user'
 USERNAME_2 = 'follower'
@@ -79,6 +87,9 @@ class PostsViewsTests(TestCase):
         super().tearDownClass()
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
+    def setUp(self):
+        cache.clear()
+
     def test_index_group_list_profile_pages_show_correct_context(self):
         """Пост корректно передается на страницы."""
         Follow.objects.create(user=self.follower, author=self.user)
@@ -148,6 +159,35 @@ class PostsViewsTests(TestCase):
                     posts_per_page
                 )
 
+    def test_cursor_paginator(self):
+        """Курсоры ведут на соседние страницы ленты."""
+        Post.objects.all().delete()
+        Post.objects.bulk_create((Post(
+            text=f'Тест_{post_id}',
+            author=self.user,
+            group=self.group
+        ) for post_id in range(NUMBER_OF_POSTS)))
+        for url in [INDEX, GROUP_URL, PROFILE]:
+            with self.subTest(url=url):
+                first_page = self.guest.get(url).context['page_obj']
+                second_page = self.guest.get(
+                    url, {'cursor': next_cursor(first_page)}
+                ).context['page_obj']
+                self.assertEqual(
+                    len(second_page), NUMBER_OF_POSTS - POSTS_PER_PAGE
+                )
+                self.assertFalse(second_page.has_next())
+                self.assertTrue(second_page.has_previous())
+                self.assertFalse(
+                    set(first_page) & set(second_page)
+                )
+                self.assertEqual(
+                    list(first_page),
+                    list(self.guest.get(
+                        url, {'cursor': previous_cursor(second_page)}
+                    ).context['page_obj'])
+                )
+
     def test_post_detail_page_show_correct_context(self):
         """Комментарий корректно передается на страницу."""
         response = self.guest.get(self.POST_DETAIL)
@@ -158,17 +198,127 @@ class PostsViewsTests(TestCase):
         self.assertEqual(self.comment.post, comment.post)
         self.assertEqual(self.comment.id, comment.id)
 
-    def test_index_cache(self):
-        """Проверяем работу кеширования списка постов на главной странице"""
-        response_posts_exist = self.guest.get(INDEX)
-        Post.objects.all().delete()
-        self.assertEquals(
-            response_posts_exist.content, self.guest.get(INDEX).content
+    def test_post_comments_pagination(self):
+        """Комментарии выводятся порциями, следующая порция по курсору."""
+        Comment.objects.bulk_create(Comment(
+            post=self.post, author=self.follower, text=f'Комментарий {number}'
+        ) for number in range(COMMENTS_PER_PAGE))
+        comments = self.guest.get(self.POST_DETAIL).context['comments']
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertTrue(comments.has_next())
+        response = self.guest.get(
+            reverse('posts:post_comments', args=[self.post.id]),
+            {'cursor': next_cursor(comments)}
         )
-        cache.clear()
-        self.assertNotEquals(
-            response_posts_exist.content, self.guest.get(INDEX).content
+        self.assertEqual(list(response.context['comments']), [self.comment])
+        self.assertFalse(response.context['comments'].has_next())
+
+    def test_feed_cache(self):
+        """Кеш лент хранится до изменения постов."""
+        for url in [INDEX, GROUP_URL, PROFILE]:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                Post.objects.filter(pk=self.post.pk).update(
+                    text='Изменено в обход сигналов'
+                )
+                self.assertEqual(
+                    response.content, self.guest.get(url).content
+                )
+                Post.objects.create(
+                    text='Новый пост', author=self.user, group=self.group
+                )
+                self.assertNotEqual(
+                    response.content, self.guest.get(url).content
+                )
+
+    def test_feed_cache_keys_valid_for_memcached(self):
+        """Слаг и username с пробелами не ломают ключи кеша."""
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', CacheKeyWarning)
+            author = User.objects.create_user(username='Автор поста')
+            Group.objects.create(
+                title='Группа', slug='новая группа', description='Описание'
+            )
+            Post.objects.create(text='Пост', author=author)
+            self.assertEqual(
+                self.guest.get(
+                    reverse('posts:profile', args=[author.username])
+                ).status_code,
+                OK
+            )
+        self.assertEqual(
+            [
+                str(warning.message) for warning in caught
+                if issubclass(warning.category, CacheKeyWarning)
+            ],
+            []
+        )
+
+    def test_post_page_follows_author_changes(self):
+        """Страница поста обновляется с новым постом или именем автора."""
+        response = self.guest.get(self.POST_DETAIL)
+        Post.objects.create(text='Другой пост', author=self.user)
+        self.assertNotEqual(
+            response.content, self.guest.get(self.POST_DETAIL).content
         )
+        for url in [PROFILE, self.POST_DETAIL]:
+            with self.subTest(url=url):
+                self.guest.get(url)
+                self.user.first_name = f'Имя для {url}'
+                self.user.save()
+                self.assertContains(self.guest.get(url), self.user.first_name)
+
+    def test_page_cache_ignores_unknown_params(self):
+        """Параметры, которые view не читает, не создают новых записей."""
+        self.guest.get(INDEX)
+        with self.assertNumQueries(0):
+            self.guest.get(INDEX, {'utm_source': 'mail'})
+
+    def test_post_delete_signals_query_each_author_once(self):
+        """Каскадное удаление не читает автора для каждого поста."""
+        for number in range(3):
+            Post.objects.create(
+                text=f'Пост {number}', author=self.user, group=self.group
+            )
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            Post.objects.filter(author=self.user).delete()
+        lookups = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "auth_user"' in query['sql']
+        ]
+        self.assertEqual(len(lookups), 1)
+
+    def test_anonymous_page_cache_conditional_get(self):
+        """Анонимный пользователь получает 304 для неизменившейся страницы."""
+        for url in [INDEX, GROUP_URL, PROFILE, self.POST_DETAIL]:
+            with self.subTest(url=url):
+                response = self.guest.get(url)
+                self.assertEqual(
+                    self.guest.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    ).status_code,
+                    NOT_MODIFIED
+                )
+                self.assertEqual(
+                    self.guest.get(
+                        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                    ).status_code,
+                    NOT_MODIFIED
+                )
+                Comment.objects.create(
+                    post=self.post, author=self.user, text='Новый'
+                )
+                Post.objects.create(
+                    text='Новый пост', author=self.user, group=self.group
+                )
+                self.assertEqual(
+                    self.guest.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    ).status_code,
+                    OK
+                )
 
     def test_follow(self):
         """Авторизованный пользователь может подписываться на авторов"""
@@ -178,6 +328,36 @@ class PostsViewsTests(TestCase):
             Follow.objects.filter(user=self.follower, author=self.user)
         )
 
+    def test_follow_timeline(self):
+        """Лента подписок пополняется при подписке и новых постах."""
+        Follow.objects.all().delete()
+        self.another.get(FOLLOW)
+        new_post = Post.objects.create(text='Новый пост', author=self.user)
+        self.assertEqual(
+            list(self.another.get(FOLLOW_INDEX).context['page_obj']),
+            [new_post, self.post]
+        )
+        self.another.get(UNFOLLOW)
+        self.assertEqual(
+            len(self.another.get(FOLLOW_INDEX).context['page_obj']), 0
+        )
+
+    def test_timeline_trimmed(self):
+        """Лента подписчика хранит только TIMELINE_LENGTH записей."""
+        Follow.objects.create(user=self.follower, author=self.user)
+        with mock.patch.object(timeline, 'TIMELINE_LENGTH', 2):
+            posts = [
+                Post.objects.create(text=f'Пост {number}', author=self.user)
+                for number in range(3)
+            ]
+        self.assertEqual(
+            list(self.another.get(FOLLOW_INDEX).context['page_obj']),
+            posts[:0:-1]
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.follower).count(), 2
+        )
+
     def test_unfollow(self):
         """Авторизованный пользователь может отписываться от авторов"""
         Follow.objects.create(user=self.follower, author=self.user)
@@ -0,0 +1,252 @@
+from threading import Lock
+
+from django.core.cache import cache
+from django.db import transaction
+from PIL import features
+from sorl import __version__ as sorl_version
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings, settings
+from sorl.thumbnail.images import (
+    deserialize_image_file, ImageFile, serialize_image_file
+)
+
+from core.tasks import submit
+
+from . import feed_cache
+from .models import ArchivedPost, Post
+from .settings import FEED_CACHE_TIMEOUT
+
+THUMBNAIL_WIDTH = 960
+THUMBNAIL_HEIGHT = 339
+VARIANT_WIDTHS = (320, 640, 960)
+VARIANT_FORMATS = ('WEBP', 'JPEG') if features.check('webp') else ('JPEG',)
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+STORED_IMAGE_KEY = 'thumbnail-file:{}'
+# Ещё не созданная миниатюра: kvstore не спрашивается до истечения срока.
+MISSING_IMAGE = ''
+MISSING_IMAGE_TIMEOUT = 60
+# Версии sorl, для которых проверены внутренние методы, дающие имя
+# миниатюры (_get_format, _get_thumbnail_filename).
+SORL_NAME_VERSIONS = ('12.',)
+_pending = set()
+_pending_lock = Lock()
+
+
+def variant_specs() -> list:
+    """Пары (формат, ширина) всех вариантов миниатюры поста."""
+    return [
+        (image_format, width)
+        for image_format in VARIANT_FORMATS
+        for width in VARIANT_WIDTHS
+    ]
+
+
+def variant_geometry(width) -> str:
+    return f'{width}x{round(width * THUMBNAIL_HEIGHT / THUMBNAIL_WIDTH)}'
+
+
+class Picture:
+    """Набор готовых вариантов миниатюры для тега <picture>."""
+
+    width = THUMBNAIL_WIDTH
+    height = THUMBNAIL_HEIGHT
+
+    def __init__(self, variants) -> None:
+        self.variants = variants
+
+    def srcset(self, image_format) -> str:
+        return ', '.join(
+            f'{thumbnail.url} {width}w'
+            for (variant_format, width), thumbnail in self.variants.items()
+            if variant_format == image_format
+        )
+
+    @property
+    def src(self) -> str:
+        return self.variants['JPEG', THUMBNAIL_WIDTH].url
+
+    @property
+    def jpeg_srcset(self) -> str:
+        return self.srcset('JPEG')
+
+    @property
+    def webp_srcset(self) -> str:
+        return self.srcset('WEBP')
+
+
+class PrecomputedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl, умеющий найти готовую миниатюру без Pillow."""
+
+    names_supported = sorl_version.startswith(SORL_NAME_VERSIONS)
+
+    def thumbnail_file(self, file_, geometry_string, **options) -> ImageFile:
+        """
+        ImageFile миниатюры: то же имя, что даст get_thumbnail().
+
+        С непроверенной версией sorl имя даёт сам get_thumbnail(), хотя
+        тогда миниатюра создаётся прямо в запросе.
+        """
+        if not self.names_supported:
+            return self.get_thumbnail(file_, geometry_string, **options)
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return ImageFile(
+            self._get_thumbnail_filename(source, geometry_string, options),
+            default.storage
+        )
+
+
+backend = PrecomputedThumbnailBackend()
+
+
+def invalidate_pages(image_name) -> None:
+    """Сбрасывает кеш страниц, где вместо миниатюры была заглушка."""
+    scopes = {feed_cache.INDEX_SCOPE}
+    for model in (Post, ArchivedPost):
+        posts = model.objects.filter(image=image_name).select_related(
+            'author', 'group'
+        ).only('pk', 'author__username', 'group__slug')
+        for post in posts:
+            scopes.add(feed_cache.author_scope(post.author.username))
+            scopes.add(feed_cache.post_scope(post.pk))
+            if post.group:
+                scopes.add(feed_cache.group_scope(post.group.slug))
+    feed_cache.bump(*scopes)
+
+
+def generate(image_name) -> None:
+    """Создаёт все варианты миниатюры поста. Выполняется в фоне."""
+    try:
+        source = ImageFile(image_name, Post.image.field.storage)
+        size = Post.objects.filter(
+            image=image_name, image_width__isnull=False
+        ).values_list('image_width', 'image_height').first()
+        if size:
+            # Размеры оригинала уже известны: sorl не читает их из файла.
+            source.set_size(size)
+            default.kvstore.get_or_set(source)
+        thumbnails = [
+            backend.get_thumbnail(
+                source, variant_geometry(width),
+                format=image_format, **THUMBNAIL_OPTIONS
+            )
+            for image_format, width in variant_specs()
+        ]
+        # Заменяет записи о промахах, иначе заглушка дожила бы до их срока.
+        cache.set_many({
+            STORED_IMAGE_KEY.format(thumbnail.key):
+                serialize_image_file(thumbnail)
+            for thumbnail in thumbnails
+        }, FEED_CACHE_TIMEOUT)
+        invalidate_pages(image_name)
+    finally:
+        with _pending_lock:
+            _pending.discard(image_name)
+
+
+def schedule(image_name) -> None:
+    """
+    Ставит создание миниатюр в фоновый пул, не дублируя задачи.
+
+    Имя попадает в _pending только после фиксации транзакции: при откате
+    задача не запустится и не уберёт его оттуда.
+    """
+    if image_name:
+        transaction.on_commit(lambda: _submit_once(image_name))
+
+
+def _submit_once(image_name) -> None:
+    with _pending_lock:
+        if image_name in _pending:
+            return
+        _pending.add(image_name)
+    try:
+        submit(generate, image_name)
+    except Exception:
+        with _pending_lock:
+            _pending.discard(image_name)
+        raise
+
+
+def stored_images(files) -> dict:
+    """
+    Готовые миниатюры из kvstore sorl: {ключ ImageFile: ImageFile}.
+
+    Ответы kvstore копируются в кеш Django, промахи — на
+    MISSING_IMAGE_TIMEOUT, поэтому миниатюры страницы читаются одним
+    get_many; kvstore.get() спрашивается только о файлах, которых в кеше
+    нет совсем.
+    """
+    files = {STORED_IMAGE_KEY.format(file.key): file for file in files}
+    cached = cache.get_many(list(files))
+    stored = {
+        files[cache_key].key: deserialize_image_file(value)
+        for cache_key, value in cached.items() if value != MISSING_IMAGE
+    }
+    found, missing = {}, {}
+    for cache_key, file in files.items():
+        if cache_key in cached:
+            continue
+        thumbnail = default.kvstore.get(file)
+        if thumbnail is None:
+            missing[cache_key] = MISSING_IMAGE
+        else:
+            stored[file.key] = thumbnail
+            found[cache_key] = serialize_image_file(thumbnail)
+    cache.set_many(found, FEED_CACHE_TIMEOUT)
+    cache.set_many(missing, MISSING_IMAGE_TIMEOUT)
+    return stored
+
+
+def variant_files(image) -> dict:
+    """ImageFile всех вариантов миниатюры: {(формат, ширина): ImageFile}."""
+    return {
+        (image_format, width): backend.thumbnail_file(
+            image, variant_geometry(width),
+            format=image_format, **THUMBNAIL_OPTIONS
+        )
+        for image_format, width in variant_specs()
+    }
+
+
+def forget_stored_images(files) -> None:
+    """Убирает из кеша Django записи stored_images() об удалённых файлах."""
+    cache.delete_many([STORED_IMAGE_KEY.format(file.key) for file in files])
+
+
+def resolve_pictures(images) -> dict:
+    """
+    Варианты миниатюр для всех изображений страницы: {имя файла: Picture}.
+
+    Если у изображения нет хотя бы одного варианта, запрос не ждёт
+    Pillow: создание ставится в фон, а вместо Picture будет None.
+    """
+    files = {image.name: variant_files(image) for image in images if image}
+    stored = stored_images(
+        thumbnail
+        for variants in files.values() for thumbnail in variants.values()
+    )
+    pictures = {}
+    for name, variants in files.items():
+        found = {spec: stored.get(file.key) for spec, file in variants.items()}
+        if None in found.values():
+            schedule(name)
+            pictures[name] = None
+        else:
+            pictures[name] = Picture(found)
+    return pictures
+
+
+def cached_picture(image) -> object:
+    """Варианты миниатюры одного изображения или None."""
+    if not image:
+        return None
+    return resolve_pictures([image])[image.name]
@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import F
+
+from .models import AuthorCounters, Follow, Post, TimelineEntry
+from .settings import TIMELINE_LENGTH, TIMELINE_MAX_FOLLOWING
+
+BATCH_SIZE = 500
+TRIM_SQL = (
+    'DELETE FROM {table} WHERE id IN ('
+    'SELECT id FROM ('
+    'SELECT id, ROW_NUMBER() OVER ('
+    'PARTITION BY user_id ORDER BY pub_date DESC'
+    ') AS position FROM {table} WHERE user_id IN ({user_ids})'
+    ') AS ranked WHERE position > %s)'
+)
+
+
+def trim(user_ids) -> None:
+    """
+    Обрезает ленты пользователей до TIMELINE_LENGTH последних записей.
+
+    Одним запросом на BATCH_SIZE пользователей: позиции записей в лентах
+    считает оконная функция по индексу (user, -pub_date).
+    """
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        with connection.cursor() as cursor:
+            cursor.execute(TRIM_SQL.format(
+                table=TimelineEntry._meta.db_table,
+                user_ids=', '.join(['%s'] * len(batch))
+            ), [*batch, TIMELINE_LENGTH])
+
+
+def fan_out(post) -> None:
+    """Добавляет новый пост в ленты всех подписчиков автора."""
+    fan_out_posts([post])
+
+
+def fan_out_posts(posts) -> None:
+    """Добавляет новые посты в ленты подписчиков: запрос на автора."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    for author_id, author_posts in by_author.items():
+        follower_ids = list(Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True))
+        TimelineEntry.objects.bulk_create((
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in follower_ids for post in author_posts
+        ), batch_size=BATCH_SIZE, ignore_conflicts=True)
+        trim(follower_ids)
+
+
+def backfill(user_id, author_id) -> None:
+    """Переносит последние посты автора в ленту нового подписчика."""
+    TimelineEntry.objects.bulk_create((
+        TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in Post.objects.filter(
+            author_id=author_id
+        ).values_list('pk', 'pub_date')[:TIMELINE_LENGTH]
+    ), batch_size=BATCH_SIZE, ignore_conflicts=True)
+    trim([user_id])
+
+
+def prune(user_id, author_id) -> None:
+    """Убирает посты автора из ленты отписавшегося пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+def rebuild() -> None:
+    """Пересобирает ленты всех пользователей с нуля."""
+    TimelineEntry.objects.all().delete()
+    for user_id, author_id in Follow.objects.values_list(
+        'user_id', 'author_id'
+    ).iterator():
+        backfill(user_id, author_id)
+
+
+def follow_feed(user) -> object:
+    """
+    Лента подписок пользователя.
+
+    Читается из материализованной ленты; для пользователей с очень
+    большим числом подписок ограниченная лента покрывает слишком
+    короткий период, поэтому для них используется join через Follow.
+    Дата для сортировки и курсора — feed_date: у материализованной ленты
+    это дата записи, чтобы страница читалась по индексу (user, -pub_date).
+    """
+    following_count = AuthorCounters.objects.filter(author=user).values_list(
+        'following_count', flat=True
+    ).first() or 0
+    if following_count > TIMELINE_MAX_FOLLOWING:
+        return Post.objects.filter(author__following__user=user).annotate(
+            feed_date=F('pub_date')
+        )
+    return Post.objects.filter(timeline_entries__user=user).annotate(
+        feed_date=F('timeline_entries__pub_date')
+    )
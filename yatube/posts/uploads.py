@@ -0,0 +1,156 @@
+import os
+from io import BytesIO
+
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from PIL import Image, ImageOps
+
+from .models import Post
+from .settings import (
+    IMAGE_MAX_PIXELS, IMAGE_MAX_SIDE, IMAGE_MAX_UPLOAD_SIZE, IMAGE_QUALITY
+)
+
+# Анимацию и палитру GIF не пересобираем: такие файлы сохраняются как есть.
+PASSTHROUGH_FORMATS = ('GIF',)
+SAVE_OPTIONS = {
+    'JPEG': {'quality': IMAGE_QUALITY, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': IMAGE_QUALITY},
+}
+# Остальные форматы, которые Pillow читает (IM, PSD, TIFF...), браузеры
+# не показывают, а записать некоторые из них Pillow не умеет: такие
+# файлы перекодируются в PNG.
+FALLBACK_FORMAT = 'PNG'
+FALLBACK_MODES = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA')
+
+
+IMAGE_METADATA_FIELDS = (
+    'image_width', 'image_height', 'image_format', 'image_size'
+)
+EMPTY_METADATA = dict.fromkeys(IMAGE_METADATA_FIELDS)
+EMPTY_METADATA['image_format'] = ''
+BACKFILL_CHUNK_SIZE = 500
+
+
+def image_metadata(file) -> dict:
+    """
+    Размеры, формат и размер файла изображения для полей Post.
+
+    Pillow читает только заголовок, пиксели не декодируются.
+    """
+    position = file.tell() if hasattr(file, 'tell') else 0
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+            image_format = image.format
+    finally:
+        file.seek(position)
+    return {
+        'image_width': width,
+        'image_height': height,
+        'image_format': image_format,
+        'image_size': file.size,
+    }
+
+
+def backfill_metadata() -> tuple:
+    """
+    Заполняет метаданные изображений у постов, где их нет.
+
+    Возвращает (заполнено, файлов не найдено или не прочитано).
+    """
+    filled = failed = 0
+    last_pk = 0
+    while True:
+        posts = list(Post.objects.exclude(image='').filter(
+            pk__gt=last_pk, image_width__isnull=True
+        ).order_by('pk').only('pk', 'image')[:BACKFILL_CHUNK_SIZE])
+        if not posts:
+            return filled, failed
+        last_pk = posts[-1].pk
+        updated = []
+        for post in posts:
+            try:
+                with post.image.open('rb') as file:
+                    metadata = image_metadata(file)
+            except (OSError, ValueError, SuspiciousFileOperation):
+                failed += 1
+                continue
+            for field, value in metadata.items():
+                setattr(post, field, value)
+            updated.append(post)
+        Post.objects.bulk_update(updated, IMAGE_METADATA_FIELDS)
+        filled += len(updated)
+
+
+def check_limits(upload, image) -> None:
+    """Отклоняет слишком большие файлы и изображения."""
+    if upload.size > IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)d МБ.',
+            code='file_too_large',
+            params={'limit': IMAGE_MAX_UPLOAD_SIZE // (1024 * 1024)},
+        )
+    width, height = image.size
+    if width * height > IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Изображение больше %(limit)d мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': IMAGE_MAX_PIXELS // 1_000_000},
+        )
+
+
+def normalize_image(upload) -> object:
+    """
+    Приводит загруженное изображение к размерам и форматам сайта.
+
+    Файл читается с диска лениво: draft() для JPEG декодирует сразу
+    уменьшенную копию, thumbnail() дожимает её через reduce().
+    EXIF отбрасывается, ориентация из него применяется к пикселям.
+    Если менять нечего, возвращается исходный файл.
+    """
+    upload.seek(0)
+    try:
+        with Image.open(upload) as image:
+            check_limits(upload, image)
+            if image.format in PASSTHROUGH_FORMATS:
+                upload.seek(0)
+                return upload
+            supported = image.format in SAVE_OPTIONS
+            oversized = max(image.size) > IMAGE_MAX_SIDE
+            if supported and not oversized and not image.getexif():
+                upload.seek(0)
+                return upload
+            image_format = image.format if supported else FALLBACK_FORMAT
+            buffer = BytesIO()
+            reencode(image, image_format).save(
+                buffer, image_format, **SAVE_OPTIONS[image_format]
+            )
+    except (OSError, ValueError):
+        raise ValidationError(
+            'Не удалось прочитать изображение.', code='invalid_image'
+        )
+    name = upload.name
+    if not supported:
+        name = f'{os.path.splitext(name)[0]}.{image_format.lower()}'
+    return InMemoryUploadedFile(
+        buffer, 'image', name, Image.MIME[image_format],
+        buffer.tell(), None
+    )
+
+
+def reencode(image, image_format) -> Image.Image:
+    """Уменьшенная и повёрнутая по EXIF копия в режиме для image_format."""
+    image.draft('RGB', (IMAGE_MAX_SIDE, IMAGE_MAX_SIDE))
+    normalized = ImageOps.exif_transpose(image)
+    normalized.thumbnail((IMAGE_MAX_SIDE, IMAGE_MAX_SIDE), reducing_gap=2.0)
+    if image_format == 'JPEG' and normalized.mode not in ('RGB', 'L'):
+        return normalized.convert('RGB')
+    if image_format == FALLBACK_FORMAT and (
+        normalized.mode not in FALLBACK_MODES
+    ):
+        return normalized.convert(
+            'RGBA' if 'A' in normalized.getbands() else 'RGB'
+        )
+    return normalized
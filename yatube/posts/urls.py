@@ -20,6 +20,9 @@ urlpatterns = [
     path('create/',
          views.post_create,
          name='post_create'),
+    path('posts/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path('posts/<int:post_id>/comment/',
          views.add_comment,
          name='add_comment'),
@@ -32,6 +35,15 @@ urlpatterns = [
     path('profile/<str:username>/unfollow/',
          views.profile_unfollow,
          name='profile_unfollow'),
+    path('search/',
+         views.search,
+         name='search'),
+    path('export/posts/',
+         views.export_posts,
+         name='export_posts'),
+    path('export/archive/',
+         views.export_archive,
+         name='export_archive'),
     path('',
          views.index,
          name='index'),
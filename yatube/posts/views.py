@@ -1,50 +1,111 @@
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
-from django.http.response import HttpResponse
+from django.http.response import (
+    HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+)
 from django.shortcuts import get_object_or_404, redirect, render
-
+from django.template.response import TemplateResponse
+from django.utils.http import urlencode
+
+from .archive import author_feed, resolve_post
+from .decorators import anonymous_page_cache
+from .exporter import (
+    POST_FIELDS, post_records, SERIALIZERS, user_archive
+)
+from .feed_cache import (
+    author_scope, cached_count, feed_cache_context, group_scope, INDEX_SCOPE,
+    post_author_scopes, post_scope
+)
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
-from .settings import POSTS_PER_PAGE
+from .paginators import FeedPaginator
+from .search import PostSearchResults, search_groups
+from .settings import COMMENTS_PER_PAGE, POSTS_PER_PAGE
+from .timeline import follow_feed
 
 
-def paginator_page(request, post_list) -> object:
-    return Paginator(
-        post_list, POSTS_PER_PAGE).get_page(request.GET.get('page'))
+def paginator_page(request, post_list, count=None, **kwargs) -> object:
+    paginator = FeedPaginator(
+        post_list, POSTS_PER_PAGE, count=count, **kwargs
+    )
+    cursor = request.GET.get('cursor')
+    if cursor:
+        return paginator.cursor_page(cursor)
+    return paginator.get_page(request.GET.get('page'))
 
 
+@anonymous_page_cache(lambda: [INDEX_SCOPE])
 def index(request) -> HttpResponse:
-    return render(request, 'posts/index.html', {
-        'page_obj': paginator_page(request, Post.objects.all())
+    return TemplateResponse(request, 'posts/index.html', {
+        'page_obj': paginator_page(
+            request,
+            Post.objects.for_feed(),
+            count=cached_count(INDEX_SCOPE, Post.objects.all())
+        ),
+        **feed_cache_context(INDEX_SCOPE),
     })
 
 
+@anonymous_page_cache(lambda slug: [group_scope(slug)])
 def group_posts(request, slug) -> HttpResponse:
     group = get_object_or_404(Group, slug=slug)
-    return render(request, 'posts/group_list.html', {
+    return TemplateResponse(request, 'posts/group_list.html', {
         'group': group,
-        'page_obj': paginator_page(request, group.posts.all())
+        'page_obj': paginator_page(
+            request, group.posts.for_feed(), count=group.posts_count
+        ),
+        **feed_cache_context(group_scope(group.slug)),
     })
 
 
+@anonymous_page_cache(lambda username: [author_scope(username)])
 def profile(request, username) -> HttpResponse:
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
     following = request.user.is_authenticated and request.user != author and (
         Follow.objects.filter(user=request.user, author=author))
-    return render(request, 'posts/profile.html', {
+    counters = getattr(author, 'counters', None)
+    return TemplateResponse(request, 'posts/profile.html', {
         'author': author,
         'following': following,
-        'page_obj': paginator_page(request, author.posts.all())
+        'page_obj': paginator_page(
+            request,
+            author_feed(author),
+            count=counters.posts_count if counters else None
+        ),
+        **feed_cache_context(author_scope(author.username)),
     })
 
 
+def comments_page(request, post) -> object:
+    return FeedPaginator(
+        post.comments.select_related('author'), COMMENTS_PER_PAGE
+    ).cursor_page(request.GET.get('cursor'))
+
+
+@anonymous_page_cache(
+    lambda post_id: [post_scope(post_id), *post_author_scopes(post_id)]
+)
 def post_detail(request, post_id) -> HttpResponse:
-    return render(request, 'posts/post_detail.html', {
-        'post': get_object_or_404(Post, pk=post_id),
+    post = resolve_post(post_id, 'author__counters', 'group')
+    return TemplateResponse(request, 'posts/post_detail.html', {
+        'post': post,
+        'archived': not isinstance(post, Post),
+        'comments': comments_page(request, post),
         'form': CommentForm(),
     })
 
 
+@anonymous_page_cache(lambda post_id: [post_scope(post_id)])
+def post_comments(request, post_id) -> HttpResponse:
+    post = resolve_post(post_id)
+    return TemplateResponse(request, 'posts/includes/comments.html', {
+        'post': post,
+        'comments': comments_page(request, post),
+    })
+
+
 @login_required
 def post_create(request) -> HttpResponse:
     form = PostForm(request.POST or None, request.FILES or None)
@@ -86,9 +147,12 @@ def add_comment(request, post_id) -> HttpResponse:
 
 @login_required
 def follow_index(request) -> HttpResponse:
-    return render(request, 'posts/follow.html', {'page_obj': paginator_page(
-        request, Post.objects.filter(author__following__user=request.user)
-    )})
+    return render(request, 'posts/follow.html', {
+        'page_obj': paginator_page(
+            request, follow_feed(request.user).for_feed(),
+            date_field='feed_date'
+        )
+    })
 
 
 @login_required
@@ -105,3 +169,47 @@ def profile_unfollow(request, username) -> HttpResponse:
         Follow, user=request.user, author__username=username
     ).delete()
     return redirect('posts:follow_index')
+
+
+def search(request) -> HttpResponse:
+    query = request.GET.get('q', '').strip()
+    return TemplateResponse(request, 'posts/search.html', {
+        'query': query,
+        'groups': search_groups(query),
+        'page_obj': Paginator(
+            PostSearchResults(query), POSTS_PER_PAGE
+        ).get_page(request.GET.get('page')),
+        'extra_query': urlencode({'q': query}) + '&',
+    })
+
+
+@login_required
+def export_posts(request) -> HttpResponse:
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in SERIALIZERS:
+        return HttpResponseBadRequest('Неизвестный формат')
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    serialize, content_type = SERIALIZERS[file_format]
+    response = StreamingHttpResponse(
+        serialize(post_records(group, author), POST_FIELDS),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{file_format}"'
+    )
+    return response
+
+
+@login_required
+def export_archive(request) -> HttpResponse:
+    response = StreamingHttpResponse(
+        user_archive(request.user), content_type='application/zip'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{request.user.username}.zip"'
+    )
+    return response
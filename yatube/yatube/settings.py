@@ -25,6 +25,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,9 +63,39 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
     }
 }
 
+# Реплики только для чтения: пути к копиям SQLite через os.pathsep в
+# SQLITE_REPLICAS. Локально их обновляет команда sync_replicas.
+for number, path in enumerate(
+    filter(None, os.environ.get('SQLITE_REPLICAS', '').split(os.pathsep)),
+    start=1
+):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKINESS_SECONDS = 10
+
+# Применяются к каждому новому подключению SQLite (core.db).
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -113,8 +144,41 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# 'X-Sendfile' (Apache, lighttpd) или 'X-Accel-Redirect' (nginx): файлы
+# отдаёт фронтовой сервер. None — Django через FileResponse.
+MEDIA_SENDFILE_HEADER = None
+
+# Префикс internal location в nginx, который указывает на MEDIA_ROOT.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+MEDIA_CACHE_MAX_AGE = 60 * 60
+
+# Имена, которые меняются вместе с содержимым: миниатюры sorl и
+# изображения в хранилище по хешу.
+MEDIA_IMMUTABLE_PATTERNS = (
+    r'^cache/',
+    r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.',
+)
+
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Двухуровневый кеш: LRU в памяти процесса перед файлом SQLite, общим
+# для всех процессов хоста. Тесты подменяют его общей базой в памяти
+# (core.runner).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.TwoTierCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'LOCAL_MAX_BYTES': 16 * 1024 * 1024,
+        },
     }
 }
+
+# 0 — выполнять фоновые задачи сразу после фиксации транзакции.
+BACKGROUND_WORKERS = 2
+
+TEST_RUNNER = 'core.runner.TestRunner'